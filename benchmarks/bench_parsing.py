@@ -0,0 +1,114 @@
+"""Compare html.parser BeautifulSoup, lxml parse_html and the compiled rule matcher
+
+Usage:
+    python benchmarks/bench_parsing.py [--pages DIR] [--repeat N] [--json OUT]
+
+Saved pages in DIR are classified by file name prefix (linkedin*, twitter*,
+google*/duckduckgo*/search*, anything else is treated as a website). Without
+--pages, synthetic multi-megabyte pages of each kind are generated.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract_rules import PLATFORM_RULES, extract_image_urls
+from html_parse import parse_html
+
+# PLATFORM_RULES entry per page kind, and whether a soup needs the full tree for its selectors
+KINDS = {
+    'linkedin': ('linkedin', True),
+    'twitter': ('twitter', False),
+    'search': ('duckduckgo', False),
+    'website': ('website', True),
+}
+
+
+def synthetic_page(kind: str, size_mb: float = 2.0) -> bytes:
+    """A page shaped like the real thing: og:image head, deep markup, big inline scripts"""
+    head = ('<html><head><title>x</title>'
+            '<meta property="og:image" content="https://media.licdn.com/dms/image/profile-displayphoto.jpg">'
+            + '<link rel="stylesheet" href="/s.css">' * 20 + '</head><body>')
+    block = ('<div class="card"><div class="row"><span>Lorem ipsum dolor sit amet</span>'
+             '<a href="https://example.com/p">link</a>'
+             '<img src="https://pbs.twimg.com/profile_images/1/x_normal.jpg" alt="profile photo">'
+             '</div></div>')
+    script = '<script>var data = ' + json.dumps(['https://example.com/i%d.jpg' % i for i in range(200)]) + ';</script>'
+    unit = block * 10 + (script if kind == 'search' else '')
+    body = []
+    total = len(head)
+    while total < size_mb * 1024 * 1024:
+        body.append(unit)
+        total += len(unit)
+    return (head + ''.join(body) + '<div class="profile-photo"><img src="/me.jpg"></div></body></html>').encode()
+
+
+def load_pages(directory: str):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        lower = name.lower()
+        kind = next((k for k in ('linkedin', 'twitter') if lower.startswith(k)), None)
+        if kind is None:
+            kind = 'search' if lower.startswith(('google', 'duckduckgo', 'search', 'bing')) else 'website'
+        with open(os.path.join(directory, name), 'rb') as f:
+            pages.append((name, kind, f.read()))
+    return pages
+
+
+def run_selectors(soup, selectors):
+    return sum(len(soup.select(sel)) for sel in selectors)
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', help="directory of saved HTML pages")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="write results to this file")
+    args = parser.parse_args(argv)
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        pages = [(f"synthetic-{kind}", kind, synthetic_page(kind)) for kind in KINDS]
+
+    results = []
+    for name, kind, content in pages:
+        platform, full_tree = KINDS[kind]
+        selectors = PLATFORM_RULES[platform]['selectors']
+        if full_tree:
+            fast_parse = lambda: parse_html(content, only=None)
+        else:
+            fast_parse = lambda: parse_html(content)
+        baseline = best_of(lambda: run_selectors(BeautifulSoup(content, 'html.parser'), selectors), args.repeat)
+        fast = best_of(lambda: run_selectors(fast_parse(), selectors), args.repeat)
+        compiled = best_of(lambda: extract_image_urls(content, platform), args.repeat)
+        results.append({'page': name, 'kind': kind, 'bytes': len(content),
+                        'html_parser_s': round(baseline, 4), 'lxml_s': round(fast, 4),
+                        'compiled_s': round(compiled, 4),
+                        'speedup': round(baseline / fast, 2) if fast else None,
+                        'compiled_speedup': round(baseline / compiled, 2) if compiled else None})
+        print(f"{name:<28} {len(content) / 1e6:6.2f} MB  html.parser {baseline * 1000:8.1f} ms"
+              f"  lxml {fast * 1000:8.1f} ms  compiled {compiled * 1000:8.1f} ms"
+              f"  x{results[-1]['speedup']} / x{results[-1]['compiled_speedup']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'parsing', 'timestamp': time.time(), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""Benchmark scrapers, searches, downloads and the per-person pipeline of every front end
+
+Usage:
+    python benchmarks/bench_scraping.py [--people N] [--latency MS] [--recordings DIR]
+                                        [--frontend NAME ...] [--json OUT]
+                                        [--compare BASELINE.json [--tolerance F]]
+
+Every request is routed to a local HTTP server. It answers with recorded
+pages from --recordings (files named after the host, e.g. www.google.com.html
+or api.github.com.json) or with synthetic stand-ins, and serves generated
+JPEGs for image URLs. --latency delays every response.
+
+Front ends: 'engine' (ScraperEngine and each of its sources, as driven by
+the batch CLI and linkedin_image.py), 'image_collector' and 'new_test'. The
+last two run the engine too, with their extra sources switched on; they are
+measured per person only, headless, with stand-ins for their widgets.
+
+Rate limiting is switched off. All traffic goes to one local host, so the
+per-host token buckets would measure the limiter, not the scrapers.
+
+With --compare, any op whose median latency grew by more than --tolerance
+over the baseline is reported, and the exit status is 1.
+"""
+import argparse
+import functools
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from PIL import Image, ImageDraw
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import image_collector
+import new_test
+from rate_limit import RateLimitedAdapter
+from scraper_engine import EXTRA_SOURCES, ScraperEngine, safe_filename
+from thumbnails import DEFAULT_THUMB_SIZE
+
+FRONTENDS = ('engine', 'image_collector', 'new_test')
+IMAGE_HOSTS = ('media.licdn.com', 'pbs.twimg.com', 'avatars.githubusercontent.com')
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+RESULTS_PER_SEARCH = 60
+PAGE_PADDING = 256 * 1024
+
+
+# ---------------------------------------------------------------- responses --
+
+@functools.lru_cache(maxsize=4096)
+def synthetic_jpeg(key: str, size: int = 400) -> bytes:
+    """A distinct picture per key, so dedupe and near-dupe checks see real work"""
+    rng = random.Random(key)
+    colour = lambda: tuple(rng.randrange(256) for _ in range(3))
+    img = Image.new('RGB', (size, size), colour())
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size), rng.randrange(size)
+        draw.ellipse([x, y, x + rng.randrange(size // 10, size // 2), y + rng.randrange(size // 10, size // 2)],
+                     fill=colour())
+    out = io.BytesIO()
+    img.save(out, 'JPEG', quality=85)
+    return out.getvalue()
+
+
+def result_urls(key: str, count: int = RESULTS_PER_SEARCH):
+    """Image URLs for one search, spread over several hosts like real results"""
+    seed = zlib.crc32(key.encode())
+    return [f"https://img{i % 8}.example.com/r/{seed}/{i}.jpg" for i in range(count)]
+
+
+def padding(size: int = PAGE_PADDING) -> str:
+    """Body markup standing in for the bulk of a real profile page"""
+    block = ('<div class="card"><div class="row"><span>Lorem ipsum dolor sit amet</span>'
+             '<a href="https://example.com/p">link</a></div></div>')
+    return block * (size // len(block))
+
+
+def profile_page(og_image: str, body_images=()) -> str:
+    imgs = ''.join(f'<img src="{url}" alt="profile photo">' for url in body_images)
+    return (f'<html><head><title>Profile</title><meta property="og:image" content="{og_image}">'
+            f'</head><body>{padding()}{imgs}</body></html>')
+
+
+def search_page(urls, links=()) -> str:
+    script = ','.join(f'["{url}",400,400]' for url in urls)
+    anchors = ''.join(f'<a href="{link}">result</a>' for link in links)
+    return (f'<html><head><title>Search</title></head><body>{anchors}'
+            f'<script>AF_initDataCallback({{data:[{script}]}});</script>{padding()}</body></html>')
+
+
+def ddg_page(urls) -> str:
+    data = ','.join(json.dumps({'image': url, 'title': 'result'}) for url in urls)
+    imgs = ''.join(f'<img src="{url}">' for url in urls[:10])
+    return (f'<html><head><title>DuckDuckGo</title></head><body>{imgs}'
+            f'<script>vqd="4-1"; DDG.results([{data}]);</script>{padding()}</body></html>')
+
+
+def bing_page(urls) -> str:
+    anchors = ''.join(f"<a class=\"iusc\" m='{json.dumps({'murl': url, 't': 'result'})}'>r</a>"
+                      for url in urls)
+    return f'<html><head><title>Bing</title></head><body>{anchors}{padding()}</body></html>'
+
+
+def synthetic_response(host: str, path: str, query: str):
+    """(content type, body) standing in for host's page at path"""
+    slug = path.strip('/').split('/')[-1] or host.split('.')[0]
+    key = f"{host}{path}?{query}"
+    if host.endswith('linkedin.com'):
+        return 'text/html', profile_page(f"https://media.licdn.com/dms/image/profile-displayphoto/{slug}.jpg")
+    if host in ('x.com', 'twitter.com'):
+        return 'text/html', profile_page(f"https://pbs.twimg.com/profile_images/1/{slug}_normal.jpg")
+    if host == 'api.github.com':
+        return 'application/json', json.dumps({
+            'login': slug, 'name': slug.replace('-', ' '),
+            'avatar_url': f"https://avatars.githubusercontent.com/u/{zlib.crc32(slug.encode())}"})
+    if host.endswith('google.com'):
+        q = parse_qs(query).get('q', [''])[0]
+        links = [f"https://medium.com/@{zlib.crc32(q.encode())}", f"https://substack.com/@{zlib.crc32(q.encode())}"]
+        return 'text/html', search_page(result_urls(key), links)
+    if host.endswith('duckduckgo.com'):
+        return 'text/html', ddg_page(result_urls(key))
+    if host.endswith('bing.com'):
+        return 'text/html', bing_page(result_urls(key))
+    # Anything else is a personal site, blog or article
+    return 'text/html', profile_page(f"https://{host}/images/{slug}.jpg", result_urls(key, 3))
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    """Serves /<original host>/<original path> as rewritten by LocalRoute"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        path = '/' + path
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        recorded = self.server.recordings.get(host)
+        if recorded:
+            content_type, body = recorded
+        elif host in IMAGE_HOSTS or path.lower().endswith(IMAGE_EXTS):
+            content_type, body = 'image/jpeg', synthetic_jpeg(host + path, self.server.image_size)
+        else:
+            content_type, body = synthetic_response(host, path, parts.query)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load_recordings(directory: str):
+    """host -> (content type, body) for every file in directory"""
+    types = {'.json': 'application/json', '.jpg': 'image/jpeg', '.png': 'image/png'}
+    recordings = {}
+    if not directory:
+        return recordings
+    for name in os.listdir(directory):
+        host, ext = os.path.splitext(name)
+        with open(os.path.join(directory, name), 'rb') as f:
+            recordings[host] = (types.get(ext, 'text/html'), f.read())
+    return recordings
+
+
+class BenchServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Head-only page reads hang up mid-body on purpose
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(latency: float, recordings, image_size: int) -> BenchServer:
+    server = BenchServer(('127.0.0.1', 0), BenchHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.recordings = recordings
+    server.image_size = image_size
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class LocalRoute(BaseAdapter):
+    """Rewrites every request to the bench server, then hands it to the session's own adapter"""
+
+    def __init__(self, inner, base: str):
+        super().__init__()
+        self.inner = inner
+        self.base = base
+        if isinstance(inner, RateLimitedAdapter):
+            inner.limiter = None
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base}/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else '')
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+
+def route(session: requests.Session, base: str) -> requests.Session:
+    inner = session.get_adapter('https://example.com')
+    adapter = LocalRoute(inner, base)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# ---------------------------------------------------------------- front ends --
+
+class Field:
+    """Stand-in for a Tk variable or entry"""
+
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class Inert:
+    """Stand-in for widgets a pipeline only pokes at (buttons, progress bars, dialogs)"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def person(i: int):
+    name = f"Bench Person {i}"
+    slug = f"bench-person-{i}"
+    return name, slug
+
+
+def engine_ops(base: str, folder: str, max_images: int):
+    engine = ScraperEngine(folder, max_images=max_images, log=quiet, extra_sources=tuple(EXTRA_SOURCES))
+    route(engine.session, base)
+
+    def fresh(fn):
+        # Each call starts with an empty seen set, as a new person would
+        def call(*args):
+            engine.scraped_urls.clear()
+            return fn(*args)
+        return call
+
+    def download(i):
+        name, _ = person(i)
+        return [engine.download_image({'url': url, 'source': 'Bench', 'platform': 'bench'}, name)
+                for url in result_urls(f"download-{i}", max_images)]
+
+    return {
+        'scrape_linkedin': fresh(lambda i: engine.scrape_linkedin(f"https://www.linkedin.com/in/{person(i)[1]}")),
+        'scrape_twitter': fresh(lambda i: engine.scrape_twitter(person(i)[1])),
+        'scrape_github': fresh(lambda i: engine.scrape_github(person(i)[1])),
+        'scrape_website': fresh(lambda i: engine.scrape_website(f"https://{person(i)[1]}.example.org")),
+        'search_google_images': fresh(lambda i: engine.search_google_images(person(i)[0], max_images)),
+        'search_duckduckgo_images': fresh(lambda i: engine.search_duckduckgo_images(person(i)[0], max_images)),
+        'search_bing_images': fresh(lambda i: engine.search_bing_images(person(i)[0], max_images)),
+        'search_site': fresh(lambda i: engine.search_site('medium', person(i)[0])),
+        'download_image': download,
+        'pipeline': lambda i: engine.scrape_person({
+            'name': person(i)[0], 'linkedin': person(i)[1], 'twitter': person(i)[1],
+            'github': person(i)[1], 'website': f"{person(i)[1]}.example.org",
+            'max_images': max_images})['files'],
+    }
+
+
+def saved_files(folder: str, name: str):
+    """Images the engine saved for a person (files are named <person>_<platform>_<digest>)"""
+    prefix = safe_filename(name) + '_'
+    return [f for f in os.listdir(folder) if f.startswith(prefix)] if os.path.isdir(folder) else []
+
+
+def image_collector_ops(base: str, folder: str, max_images: int):
+    gui = object.__new__(image_collector.ProfileImageScraperGUI)
+    gui.engine = ScraperEngine(folder, log=quiet, thumbnail_size=DEFAULT_THUMB_SIZE, extra_sources=('bing',))
+    gui.session = route(gui.engine.session, base)
+    gui.download_folder = folder
+    gui.is_scraping = True
+    gui.log_message = quiet
+    gui.folder_var = Field(folder)
+    gui.max_images_var = Field(str(max_images))
+    gui.twitter_entry, gui.github_entry, gui.linkedin_entry = Field(), Field(), Field()
+    gui.root = gui.start_button = gui.stop_button = gui.progress = gui.status_var = Inert()
+    image_collector.messagebox = Inert()
+
+    def pipeline(i):
+        name, slug = person(i)
+        gui.twitter_entry.set(slug)
+        gui.github_entry.set(slug)
+        gui.linkedin_entry.set(f"https://www.linkedin.com/in/{slug}")
+        gui.scrape_images(name)
+        return saved_files(folder, name)
+
+    return {'pipeline': pipeline}
+
+
+def new_test_ops(base: str, folder: str, max_images: int):
+    gui = object.__new__(new_test.ScraperGUI)
+    gui.engine = ScraperEngine(folder, log=quiet, extra_sources=('medium', 'substack'))
+    gui.session = route(gui.engine.session, base)
+    gui.running = Field(True)
+    gui.folder = Field(folder)
+    gui.max_imgs = Field(max_images)
+    gui.name, gui.lnkurl, gui.compan = Field(), Field(), Field()
+    gui.log = quiet
+    gui.prog = gui.start_b = gui.stop_b = Inert()
+
+    def pipeline(i):
+        name, slug = person(i)
+        gui.running.set(True)
+        gui.name.set(name)
+        gui.lnkurl.set(f"https://www.linkedin.com/in/{slug}")
+        gui.worker()
+        return saved_files(folder, name)
+
+    return {'pipeline': pipeline}
+
+
+# ---------------------------------------------------------------- measuring --
+
+def count_items(result) -> int:
+    if isinstance(result, (list, tuple)):
+        return sum(1 for item in result if item)
+    return 1 if result else 0
+
+
+def measure(fn, people: int, offset: int):
+    latencies, items, errors = [], 0, 0
+    started = time.perf_counter()
+    for i in range(offset, offset + people):
+        call_started = time.perf_counter()
+        try:
+            items += count_items(fn(i))
+        except Exception as e:
+            errors += 1
+            print(f"    error: {e}", file=sys.stderr)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'calls': people,
+        'items': items,
+        'errors': errors,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+        'calls_per_s': round(people / elapsed, 2) if elapsed else None,
+        'items_per_s': round(items / elapsed, 2) if elapsed else None,
+    }
+
+
+def compare(results, baseline_path: str, tolerance: float) -> int:
+    """Print ops slower than the baseline by more than tolerance; returns how many"""
+    with open(baseline_path) as f:
+        baseline = {(r['frontend'], r['op']): r for r in json.load(f)['results']}
+    regressions = 0
+    for result in results:
+        old = baseline.get((result['frontend'], result['op']))
+        if not old or not old['p50_ms']:
+            continue
+        change = result['p50_ms'] / old['p50_ms'] - 1
+        if change > tolerance:
+            regressions += 1
+            print(f"REGRESSION {result['frontend']}.{result['op']}: p50 {old['p50_ms']} -> "
+                  f"{result['p50_ms']} ms (+{change:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--people', type=int, default=5, help="calls per op, one synthetic person each")
+    parser.add_argument('--max-images', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=20, help="milliseconds added to every response")
+    parser.add_argument('--image-size', type=int, default=400, help="edge of the served JPEGs in pixels")
+    parser.add_argument('--recordings', help="directory of recorded responses named after their host")
+    parser.add_argument('--frontend', action='append', choices=FRONTENDS,
+                        help="front end to measure (repeatable, default all)")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed median slowdown before --compare reports a regression")
+    args = parser.parse_args(argv)
+
+    server = start_server(args.latency / 1000, load_recordings(args.recordings), args.image_size)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    builders = {'engine': engine_ops, 'image_collector': image_collector_ops, 'new_test': new_test_ops}
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for frontend in args.frontend or FRONTENDS:
+            ops = builders[frontend](base, os.path.join(folder, frontend), args.max_images)
+            for offset, (op, fn) in enumerate(ops.items()):
+                # Distinct people per op so no op is served from another's dedupe state
+                stats = measure(fn, args.people, offset * args.people)
+                results.append({'frontend': frontend, 'op': op, **stats})
+                print(f"{frontend:<16} {op:<28} p50 {stats['p50_ms']:9.1f} ms  p95 {stats['p95_ms']:9.1f} ms"
+                      f"  {stats['calls_per_s']:7.2f} calls/s  {stats['items']:4d} items  {stats['errors']} errors")
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'scraping', 'timestamp': time.time(),
+                       'config': {'people': args.people, 'max_images': args.max_images,
+                                  'latency_ms': args.latency, 'image_size': args.image_size,
+                                  'recordings': args.recordings},
+                       'results': results}, f, indent=2)
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
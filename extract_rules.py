@@ -0,0 +1,366 @@
+import html
+import itertools
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from html_parse import head_ended, iter_events, split_chunks
+
+# Image extraction rules per page type. Selectors are tried in order and
+# every match is emitted; adding a platform means adding an entry here.
+#   selectors    CSS subset: tag, .class, [attr], [attr="v"], [attr*="v"],
+#                [attr^="v"], [attr$="v"] (optional " i" flag), and one
+#                descendant step ("ancestor target")
+#   attrs        attributes holding the image URL, first non-empty wins
+#   require      substring the URL must contain
+#   replace      (old, new) rewrites applied to the URL
+#   absolute     resolve relative URLs against the page URL
+#   http_only    drop URLs that are not absolute http(s)
+#   per_selector cap on matches taken from each selector
+PLATFORM_RULES = {
+    'linkedin': {
+        'selectors': [
+            'meta[property="og:image"]',
+            'img[data-delayed-url*="profile-displayphoto"]',
+            '.profile-photo img',
+            '.pv-top-card__photo img',
+        ],
+        'attrs': ['content', 'src', 'data-delayed-url'],
+        'require': 'media.licdn.com',
+    },
+    'twitter': {
+        'selectors': [
+            'meta[property="og:image"]',
+            'img[src*="pbs.twimg.com/profile_images"]',
+            'img[src*="profile_images"]',
+        ],
+        'attrs': ['content', 'src'],
+        'require': 'pbs.twimg.com',
+        # Get higher quality version
+        'replace': [('_normal', '_400x400'), ('_bigger', '_400x400')],
+    },
+    'website': {
+        'selectors': [
+            'meta[property="og:image"]',
+            'img[alt*="profile" i]',
+            'img[class*="avatar" i]',
+            'img[class*="profile" i]',
+            '.profile img',
+            '.avatar img',
+        ],
+        'attrs': ['content', 'src'],
+        'absolute': True,
+    },
+    'search': {
+        'selectors': [
+            'img[src*="profile"]',
+            'img[src*="avatar"]',
+            'img[alt*="profile" i]',
+            'img[class*="profile" i]',
+            'img[class*="avatar" i]',
+        ],
+        'attrs': ['src'],
+        'absolute': True,
+        'per_selector': 5,
+    },
+    'duckduckgo': {
+        'selectors': ['img[src]'],
+        'attrs': ['src'],
+        'http_only': True,
+    },
+}
+
+COMPOUND_RE = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:\.[\w-]+|\[[^\]]+\])*)$')
+STEP_RE = re.compile(r'(?:[^\s\[]|\[[^\]]*\])+')
+PART_RE = re.compile(r'\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*"(?P<value>[^"]*)"\s*(?P<flag>i)?)?\s*\]')
+
+
+class Compound:
+    """One compound selector: optional tag plus class and attribute tests"""
+
+    def __init__(self, text: str):
+        match = COMPOUND_RE.match(text)
+        if not match:
+            raise ValueError(f"unsupported selector: {text!r}")
+        tag = match.group('tag')
+        self.tag = None if tag in (None, '*') else tag.lower()
+        self.tests = []
+        for part in PART_RE.finditer(match.group('rest')):
+            if part.group('cls'):
+                self.tests.append(('class', 'class', part.group('cls'), False))
+            else:
+                value = part.group('value')
+                flag = bool(part.group('flag'))
+                self.tests.append((part.group('op') or 'has', part.group('attr').lower(),
+                                   value.lower() if flag and value else value, flag))
+
+    def matches(self, tag: str, attrs) -> bool:
+        if self.tag and tag != self.tag:
+            return False
+        for op, name, value, ignore_case in self.tests:
+            actual = attrs.get(name)
+            if actual is None:
+                return False
+            if ignore_case:
+                actual = actual.lower()
+            if op == 'class' and value not in actual.split():
+                return False
+            if op == '=' and actual != value:
+                return False
+            if op == '*=' and value not in actual:
+                return False
+            if op == '^=' and not actual.startswith(value):
+                return False
+            if op == '$=' and not actual.endswith(value):
+                return False
+        return True
+
+
+class CompiledRules:
+    """Selectors compiled into a matcher that visits each element once"""
+
+    def __init__(self, selectors: Iterable[str]):
+        self.selectors = list(selectors)
+        self.targets = {}     # tag (or None for any) -> [(selector index, Compound, ancestor index)]
+        self.ancestors = []   # distinct ancestor compounds
+        ancestor_ids = {}
+        for index, selector in enumerate(self.selectors):
+            steps = STEP_RE.findall(selector)
+            if len(steps) > 2:
+                raise ValueError(f"only one descendant step is supported: {selector!r}")
+            ancestor = None
+            if len(steps) == 2:
+                ancestor = ancestor_ids.get(steps[0])
+                if ancestor is None:
+                    ancestor = ancestor_ids[steps[0]] = len(self.ancestors)
+                    self.ancestors.append(Compound(steps[0]))
+            target = Compound(steps[-1])
+            self.targets.setdefault(target.tag, []).append((index, target, ancestor))
+
+    def match(self, events) -> List[List[Dict]]:
+        """Attributes of every matching element, grouped by selector, in document order"""
+        results = [[] for _ in self.selectors]
+        open_counts = [0] * len(self.ancestors)
+        stack = []  # ancestor indexes opened by each element still open
+        any_tag = self.targets.get(None, [])
+        for event, element in events:
+            if event == 'end':
+                for ancestor in stack.pop():
+                    open_counts[ancestor] -= 1
+                continue
+
+            tag = element.tag.lower()
+            attrs = element.attrib
+            candidates = self.targets.get(tag, [])
+            if any_tag:
+                candidates = candidates + any_tag
+            for index, target, ancestor in candidates:
+                if (ancestor is None or open_counts[ancestor]) and target.matches(tag, attrs):
+                    results[index].append(dict(attrs))
+
+            opened = [i for i, compound in enumerate(self.ancestors) if compound.matches(tag, attrs)]
+            for ancestor in opened:
+                open_counts[ancestor] += 1
+            stack.append(opened)
+        return results
+
+
+_compiled = {}
+
+
+def compiled_rules(platform: str) -> CompiledRules:
+    """Cached CompiledRules for a PLATFORM_RULES entry"""
+    rules = _compiled.get(platform)
+    if rules is None:
+        rules = _compiled[platform] = CompiledRules(PLATFORM_RULES[platform]['selectors'])
+    return rules
+
+
+def rule_url(config: Dict, attrs, base_url: Optional[str] = None) -> Optional[str]:
+    """The image URL a matched element yields under a platform config, if any"""
+    url = next((attrs[a] for a in config['attrs'] if attrs.get(a)), None)
+    if not url:
+        return None
+    if config.get('absolute') and base_url and not url.startswith('http'):
+        url = urljoin(base_url, url)
+    if config.get('http_only') and not url.startswith('http'):
+        return None
+    if config.get('require') and config['require'] not in url:
+        return None
+    for old, new in config.get('replace', ()):
+        url = url.replace(old, new)
+    return url
+
+
+def extract_image_urls(content, platform: str, base_url: Optional[str] = None,
+                       events=None) -> List[Tuple[str, str]]:
+    """(url, selector) for every image a page yields under a platform's rules
+
+    Pass `events` to match over an existing iter_events stream instead of
+    parsing `content`.
+    """
+    config = PLATFORM_RULES[platform]
+    rules = compiled_rules(platform)
+    if events is None:
+        events = iter_events(split_chunks(content))
+
+    found = []
+    for selector, matches in zip(rules.selectors, rules.match(events)):
+        if config.get('per_selector'):
+            matches = matches[:config['per_selector']]
+        for attrs in matches:
+            url = rule_url(config, attrs, base_url)
+            if url:
+                found.append((url, selector))
+    return found
+
+
+# Stand-in for an element seen while reading the head, kept for replay
+SeenElement = namedtuple('SeenElement', 'tag attrib')
+
+_head_selectors = {}
+
+
+def head_selectors(platform: str) -> List[Tuple[str, Compound]]:
+    """The platform's plain meta selectors, which can match inside <head>"""
+    selectors = _head_selectors.get(platform)
+    if selectors is None:
+        selectors = _head_selectors[platform] = [
+            (selector, Compound(selector)) for selector in PLATFORM_RULES[platform]['selectors']
+            if len(STEP_RE.findall(selector)) == 1 and Compound(selector).tag == 'meta'
+        ]
+    return selectors
+
+
+def extract_head_image_urls(chunks: Iterable[bytes], platform: str,
+                            base_url: Optional[str] = None) -> List[Tuple[str, str]]:
+    """extract_image_urls over a streamed page, stopping early when the head suffices
+
+    The platform's meta selectors are tried as the <head> streams in and the
+    first URL they yield ends the read. Otherwise matching carries on through
+    the rest of the stream with every selector.
+    """
+    config = PLATFORM_RULES[platform]
+    metas = head_selectors(platform)
+    events = iter_events(chunks)
+    replay = []
+    for event, element in events:
+        tag = element.tag.lower()
+        attrs = dict(element.attrib)
+        replay.append((event, SeenElement(element.tag, attrs)))
+        if event == 'start' and tag == 'meta':
+            for selector, compound in metas:
+                url = compound.matches(tag, attrs) and rule_url(config, attrs, base_url)
+                if url:
+                    return [(url, selector)]
+        if head_ended(event, tag):
+            break
+    return extract_image_urls(None, platform, base_url, events=itertools.chain(replay, events))
+
+# Search result pages carry full-size image URLs in inline JSON and script
+# rather than markup, usually JS-escaped (\/, \u003d, \x26). Each pattern has
+# one capture group and is tagged with a kind; a page's patterns are joined
+# into one alternation so the raw response bytes are scanned once.
+#   patterns   (kind, bytes regex) pairs
+#   skip       per kind, substrings that drop a URL (checked lowercased)
+_IMAGE_URL = rb'(https?:(?:\\?/){2}(?:[^\s"\'<>\\]|\\/|\\u[0-9a-fA-F]{4}|\\x[0-9a-fA-F]{2})+?\.(?:jpe?g|png|gif|webp))(?!\w)'
+
+SEARCH_RULES = {
+    'google': {
+        'patterns': [
+            ('script', rb'"ou":"(https?:[^"]+)"'),
+            # ["url", height, width] entries in AF_initDataCallback payloads
+            ('script', rb'\["(https?:[^"]+)",\d+,\d+\]'),
+            ('img', rb'<img\b[^>]*?\s(?:data-iurl|data-src|src)="(https?:[^"]+)"'),
+            ('script', _IMAGE_URL),
+        ],
+        'skip': {'img': ('logo', 'icon', 'button', 'banner')},
+    },
+    'duckduckgo': {
+        'patterns': [
+            ('script', rb'"image":"(https?:[^"]+)"'),
+            ('script', _IMAGE_URL),
+        ],
+        'skip': {'script': ('duckduckgo.com',)},
+    },
+    'bing': {
+        'patterns': [
+            # <a class="iusc" m="{...}"> JSON, HTML-escaped inside the attribute
+            ('script', rb'murl&quot;:\s*&quot;(https?:.+?)&quot;'),
+            ('script', rb'"murl":\s*"(https?:[^"]+)"'),
+        ],
+    },
+}
+
+ESCAPE_RE = re.compile(rb'\\(?:u([0-9a-fA-F]{4})|x([0-9a-fA-F]{2})|/)')
+
+_search_compiled = {}
+
+
+def _unescape(match) -> bytes:
+    code = match.group(1) or match.group(2)
+    return chr(int(code, 16)).encode('utf-8') if code else b'/'
+
+
+def compiled_search(engine: str) -> Tuple[re.Pattern, List[str]]:
+    """Cached (alternation regex, kind per group) for a SEARCH_RULES entry"""
+    compiled = _search_compiled.get(engine)
+    if compiled is None:
+        patterns = SEARCH_RULES[engine]['patterns']
+        regex = re.compile(b'|'.join(pattern for _, pattern in patterns), re.IGNORECASE)
+        compiled = _search_compiled[engine] = (regex, [kind for kind, _ in patterns])
+    return compiled
+
+
+def extract_search_urls(content, engine: str, max_results: int,
+                        seen: Optional[set] = None) -> List[Tuple[str, str]]:
+    """(url, kind) for the first max_results new image URLs on a search page
+
+    URLs already in `seen` are skipped and returned ones are added to it.
+    Scanning stops as soon as max_results URLs are found.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    regex, kinds = compiled_search(engine)
+    skip = SEARCH_RULES[engine].get('skip', {})
+    seen = set() if seen is None else seen
+
+    found = []
+    if max_results <= 0:
+        return found
+    for match in regex.finditer(content):
+        kind = kinds[match.lastindex - 1]
+        raw = match.group(match.lastindex)
+        if b'\\' in raw:
+            raw = ESCAPE_RE.sub(_unescape, raw)
+        url = raw.decode('utf-8', 'replace')
+        if '&' in url:
+            url = html.unescape(url)
+        if url in seen or any(term in url.lower() for term in skip.get(kind, ())):
+            continue
+        seen.add(url)
+        found.append((url, kind))
+        if len(found) >= max_results:
+            break
+    return found
+
+
+def extract_result_links(content, domain: str, limit: int) -> List[str]:
+    """The first `limit` distinct links to pages on domain (or its subdomains) from a result page
+
+    Google wraps result links as /url?q=<target>&...; those are unwrapped.
+    """
+    links = []
+    for event, element in iter_events(split_chunks(content)):
+        if event != 'start' or element.tag.lower() != 'a':
+            continue
+        href = element.get('href') or ''
+        if href.startswith('/url?'):
+            href = parse_qs(urlsplit(href).query).get('q', [''])[0]
+        host = urlsplit(href).hostname or ''
+        if href.startswith('http') and (host == domain or host.endswith('.' + domain)) and href not in links:
+            links.append(href)
+            if len(links) >= limit:
+                break
+    return links
@@ -0,0 +1,70 @@
+import queue
+import time
+import tkinter as tk
+from typing import Callable, Optional, Tuple
+
+
+def plain_line(timestamp: float, message: str, level: str) -> Tuple[str, Optional[str]]:
+    """Default renderer: 'HH:MM:SS - message' with no tag"""
+    return f"{time.strftime('%H:%M:%S', time.localtime(timestamp))} - {message}\n", None
+
+
+class QueuedLogSink:
+    """Thread-safe log sink for a Tk text widget
+
+    Worker threads call put(), which only enqueues. The Tk main loop drains
+    the queue every interval_ms and inserts each batch with one widget call,
+    keeping at most max_lines lines in the widget.
+    """
+
+    def __init__(self, root: tk.Misc, text: tk.Text,
+                 render: Callable[[float, str, str], Tuple[str, Optional[str]]] = plain_line,
+                 max_lines: int = 5000, interval_ms: int = 100, batch_size: int = 500):
+        self.root = root
+        self.text = text
+        self.render = render
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self._after_id = None
+        self.start()
+
+    def put(self, message: str, level: str = "info"):
+        """Queue a message; safe to call from any thread, never blocks"""
+        self.queue.put((time.time(), message, level))
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        try:
+            self.drain()
+        finally:
+            self.start()
+
+    def drain(self):
+        """Insert up to batch_size queued messages (main thread only)"""
+        chunks = []
+        for _ in range(self.batch_size):
+            try:
+                timestamp, message, level = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            line, tag = self.render(timestamp, message, level)
+            chunks.extend((line, tag or ()))
+        if not chunks:
+            return
+
+        self.text.insert(tk.END, *chunks)
+        lines = int(self.text.index('end-1c').split('.')[0])
+        if lines > self.max_lines:
+            self.text.delete('1.0', f"{lines - self.max_lines + 1}.0")
+        self.text.see(tk.END)
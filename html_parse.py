@@ -0,0 +1,89 @@
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+
+# The only elements image extraction ever reads
+PARSE_TAGS = ('meta', 'img', 'source', 'a')
+
+# Read size for streamed pages; a typical <head> fits in the first chunk or two
+STREAM_CHUNK = 8 * 1024
+
+
+def parse_html(content: Union[bytes, str], only: Optional[Iterable[str]] = PARSE_TAGS) -> BeautifulSoup:
+    """Parse a page with lxml, keeping only the `only` tags (None keeps the full tree)
+
+    A strained tree has no ancestors for the kept tags, so selectors such
+    as '.avatar img' need only=None.
+    """
+    if only is None:
+        return BeautifulSoup(content, 'lxml')
+    return BeautifulSoup(content, 'lxml', parse_only=SoupStrainer(list(only)))
+
+
+def iter_events(chunks: Iterable[bytes]) -> Iterator[Tuple[str, etree._Element]]:
+    """Stream ('start'|'end', element) events from HTML fed chunk by chunk
+
+    Elements are cleared once closed so memory stays flat on large pages;
+    read attributes on 'start'. An empty or unparseable page has no elements.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain(parser)
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        return  # lxml refuses a document without a single element
+    yield from _drain(parser)
+
+
+def head_ended(event: str, tag: str) -> bool:
+    """True once a streamed page is past its <head>"""
+    return (event == 'end' and tag == 'head') or (event == 'start' and tag == 'body')
+
+
+def read_head_meta(chunks: Iterator[bytes], prop: str = 'og:image',
+                   accept: Optional[Callable[[str], bool]] = None) -> Tuple[Optional[str], bytes]:
+    """Stream a page until its <head> yields a <meta property=prop> worth keeping
+
+    Returns (content, data read so far). Reading stops at the first accepted
+    meta or at the end of the head; when content is None the caller can
+    parse `data + b''.join(chunks)` for the full document.
+    """
+    consumed = []
+
+    def feed():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    for event, element in iter_events(feed()):
+        tag = element.tag.lower()
+        if event == 'start' and tag == 'meta' and element.get('property') == prop:
+            content = element.get('content')
+            if content and (accept is None or accept(content)):
+                return content, b''.join(consumed)
+        if head_ended(event, tag):
+            break
+    return None, b''.join(consumed)
+
+
+def _drain(parser) -> Iterator[Tuple[str, etree._Element]]:
+    for event, element in parser.read_events():
+        if not isinstance(element.tag, str):
+            continue  # comments and processing instructions
+        yield event, element
+        if event == 'end':
+            element.clear()
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
+
+
+def split_chunks(content: Union[bytes, str], size: int = 64 * 1024) -> Iterator[bytes]:
+    """Feed an in-memory page to iter_events"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    for i in range(0, len(content), size):
+        yield content[i:i + size]
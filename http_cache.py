@@ -0,0 +1,285 @@
+import email.utils
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, stream_decode_response_unicode
+
+from rate_limit import RateLimitedAdapter
+
+# Hop-by-hop and transfer headers that must not be replayed from the cache
+DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection',
+                'keep-alive'}
+MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+# Streamed responses worth teeing into the cache: pages, not image bytes
+PAGE_TYPE_RE = re.compile(r'text/|html|xml|json', re.I)
+
+
+def parse_http_date(value: Optional[str]) -> Optional[float]:
+    """Timestamp for an HTTP date header, or None"""
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class HTTPCache:
+    """Size-bounded on-disk LRU cache of GET responses
+
+    Each entry is <key>.json (status, url, headers, stored_at) next to
+    <key>.body; file mtimes record last use so the LRU order survives
+    restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        self.load_index()
+
+    def load_index(self):
+        """Rebuild the LRU order from the files on disk"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            try:
+                meta = os.stat(os.path.join(self.directory, name))
+                body = os.stat(os.path.join(self.directory, key + '.body'))
+            except OSError:
+                continue
+            entries.append((meta.st_mtime, key, meta.st_size + body.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total += size
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def key_for(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Cached entry for url: dict with status, url, headers, stored_at and body"""
+        key = self.key_for(url)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(self._path(key, '.body'), 'rb') as f:
+                entry['body'] = f.read()
+            os.utime(self._path(key, '.json'))
+        except (OSError, ValueError):
+            self.delete(key)
+            return None
+        return entry
+
+    def put(self, url: str, status: int, headers: Dict, body: bytes, stored_at: Optional[float] = None):
+        """Store a response, evicting least recently used entries past max_bytes"""
+        key = self.key_for(url)
+        meta = json.dumps({'status': status, 'url': url, 'headers': dict(headers),
+                           'stored_at': stored_at or time.time()}).encode('utf-8')
+        size = len(meta) + len(body)
+        if size > self.max_bytes:
+            return
+        self._write(self._path(key, '.body'), body)
+        self._write(self._path(key, '.json'), meta)
+        with self._lock:
+            self._total += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stats['stores'] += 1
+            evict = []
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                evict.append(old_key)
+            self.stats['evictions'] += len(evict)
+        for old_key in evict:
+            self._remove_files(old_key)
+
+    def touch(self, url: str, headers: Dict):
+        """Refresh an entry after a 304, merging the new headers"""
+        entry = self.get(url)
+        if entry:
+            merged = dict(entry['headers'])
+            merged.update({k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS})
+            self.put(url, entry['status'], merged, entry['body'])
+
+    def delete(self, key: str):
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+        self._remove_files(key)
+
+    def _remove_files(self, key: str):
+        for suffix in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _write(self, path: str, data: bytes):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+
+def is_fresh(entry: Dict, now: Optional[float] = None) -> bool:
+    """Whether a cached entry can be served without contacting the origin"""
+    headers = CaseInsensitiveDict(entry['headers'])
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-cache' in cache_control:
+        return False
+    now = now or time.time()
+    age = now - entry['stored_at']
+    match = MAX_AGE_RE.search(cache_control)
+    if match:
+        return age < int(match.group(1))
+    expires = parse_http_date(headers.get('expires'))
+    date = parse_http_date(headers.get('date')) or entry['stored_at']
+    if expires is not None:
+        return age < expires - date
+    return False
+
+
+def is_cacheable(response: requests.Response) -> bool:
+    """Whether a fresh response is worth storing"""
+    if response.status_code != 200:
+        return False
+    cache_control = response.headers.get('cache-control', '').lower()
+    if 'no-store' in cache_control:
+        return False
+    return bool(response.headers.get('etag') or response.headers.get('last-modified')
+                or MAX_AGE_RE.search(cache_control) or response.headers.get('expires'))
+
+
+class CachingAdapter(RateLimitedAdapter):
+    """HTTPAdapter that answers GETs from an HTTPCache and revalidates with the origin
+
+    Streamed requests (image downloads, head-only page reads) are answered
+    from existing entries too. A streamed page is stored only once its body
+    has been read to the end (see finish_for_cache); image bytes are never
+    stored, since the image store already deduplicates them. Cache hits do
+    not spend rate-limit tokens.
+    """
+
+    def __init__(self, cache: HTTPCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, stream=stream, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry and is_fresh(entry):
+            self.cache.count('hits')
+            return self.build_cached_response(request, entry)
+
+        if entry:
+            cached_headers = CaseInsensitiveDict(entry['headers'])
+            etag = cached_headers.get('etag')
+            last_modified = cached_headers.get('last-modified')
+            if etag:
+                request.headers['If-None-Match'] = etag
+            if last_modified:
+                request.headers['If-Modified-Since'] = last_modified
+
+        response = super().send(request, stream=stream, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.cache.count('revalidated')
+            self.cache.touch(request.url, response.headers)
+            response.close()
+            return self.build_cached_response(request, self.cache.get(request.url) or entry)
+
+        self.cache.count('misses')
+        if stream:
+            if is_cacheable(response) and PAGE_TYPE_RE.search(response.headers.get('content-type', '')):
+                self.store_when_read(request.url, response)
+            return response
+        if is_cacheable(response):
+            headers = {k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS}
+            self.cache.put(request.url, response.status_code, headers, response.content)
+        return response
+
+    def store_when_read(self, url: str, response: requests.Response):
+        """Tee a streamed response's body into the cache, storing it if read to the end"""
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS}
+        read = response.iter_content
+
+        def tee(chunk_size):
+            body = []
+            size = 0
+            for chunk in read(chunk_size):
+                if size <= self.cache.max_bytes:
+                    body.append(chunk)
+                    size += len(chunk)
+                yield chunk
+            if size <= self.cache.max_bytes:
+                self.cache.put(url, response.status_code, headers, b''.join(body))
+
+        def iter_content(chunk_size=1, decode_unicode=False):
+            chunks = tee(chunk_size)
+            return stream_decode_response_unicode(chunks, response) if decode_unicode else chunks
+
+        # .content, .text and iter_lines all read through iter_content
+        response.iter_content = iter_content
+        response.stored_when_read = True
+
+    def build_cached_response(self, request, entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry['url']
+        response.request = request
+        response._content = entry['body']
+        response._content_consumed = True
+        response.from_cache = True
+        response.connection = self
+        return response
+
+
+def finish_for_cache(response: requests.Response, chunks: Iterator[bytes]):
+    """Read the rest of a streamed page the cache will store once it is complete
+
+    Head-only readers call this before closing the response, so cacheable
+    pages cost one full read and are then served or revalidated from disk.
+    """
+    if getattr(response, 'stored_when_read', False):
+        for _ in chunks:
+            pass
+
+
+def mount_cache(session: requests.Session, directory: str, max_bytes: int = 256 * 1024 * 1024,
+                **adapter_kwargs) -> HTTPCache:
+    """Route a session's http/https traffic through a CachingAdapter"""
+    cache = HTTPCache(directory, max_bytes)
+    adapter = CachingAdapter(cache, **adapter_kwargs)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return cache
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from http_cache import mount_cache
+from rate_limit import HostRateLimiter, RateLimitedAdapter
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+]
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENTS[0],
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+    'DNT': '1'
+}
+
+# Hosts kept with open pools (search engines, CDNs, profile sites), and
+# keep-alive connections per host; sized for DownloadPool's defaults
+# (8 workers, 2 per host) plus the async page fetches
+DEFAULT_POOL_HOSTS = 64
+DEFAULT_POOL_SIZE = 16
+
+
+class CountingConnection:
+    """Connection mixin that counts TCP (and TLS) handshakes on its pool
+
+    urllib3 reconnects a dropped keep-alive connection in place, so the
+    pool's own num_connections undercounts handshakes.
+    """
+
+    pool = None
+
+    def connect(self):
+        super().connect()
+        if self.pool is not None:
+            self.pool.handshakes += 1
+
+
+class CountingHTTPConnection(CountingConnection, HTTPConnection):
+    pass
+
+
+class CountingHTTPSConnection(CountingConnection, HTTPSConnection):
+    pass
+
+
+class CountingPool:
+    handshakes = 0
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.pool = self
+        return conn
+
+
+class CountingHTTPConnectionPool(CountingPool, HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+
+class CountingHTTPSConnectionPool(CountingPool, HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+
+COUNTING_POOLS = {'http': CountingHTTPConnectionPool, 'https': CountingHTTPSConnectionPool}
+
+
+def build_session(limiter: Optional[HostRateLimiter] = None, cache_dir: Optional[str] = None,
+                  cache_max_bytes: int = 256 * 1024 * 1024, pool_hosts: int = DEFAULT_POOL_HOSTS,
+                  pool_size: int = DEFAULT_POOL_SIZE, headers: Optional[Dict] = None) -> requests.Session:
+    """Session every scraper shares: pooled keep-alive connections, rate limits and default headers
+
+    With cache_dir, GETs also go through the HTTP cache (see
+    session_cache). Requests beyond pool_size to one host still go out
+    but their connections are not kept.
+    """
+    session = requests.Session()
+    pool_args = {'limiter': limiter, 'pool_connections': pool_hosts, 'pool_maxsize': pool_size}
+    if cache_dir:
+        mount_cache(session, cache_dir, cache_max_bytes, **pool_args)
+    else:
+        adapter = RateLimitedAdapter(**pool_args)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    session.get_adapter('https://').poolmanager.pool_classes_by_scheme = COUNTING_POOLS
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def session_cache(session: requests.Session):
+    """The HTTPCache behind a session from build_session, if it has one"""
+    return getattr(session.get_adapter('https://'), 'cache', None)
+
+
+def connection_stats(session: requests.Session) -> Dict[str, Dict[str, int]]:
+    """host -> connections opened (handshakes) and requests sent over the session's pools
+
+    Covers the pools the adapters still hold; with pool_hosts above the
+    number of hosts a run touches, that is all of them.
+    """
+    stats = defaultdict(lambda: {'connections': 0, 'requests': 0})
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = stats[pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"]
+            host['connections'] += getattr(pool, 'handshakes', pool.num_connections)
+            host['requests'] += pool.num_requests
+    return dict(stats)
+
+
+def format_connection_stats(stats: Dict[str, Dict[str, int]]) -> str:
+    """One line: connections opened, requests and the share that reused a connection"""
+    connections = sum(host['connections'] for host in stats.values())
+    requests_sent = sum(host['requests'] for host in stats.values())
+    reused = requests_sent - connections
+    share = f"{100 * reused / requests_sent:.0f}%" if requests_sent else "n/a"
+    return (f"{connections} connections for {requests_sent} requests to {len(stats)} hosts "
+            f"({reused} reused, {share})")
@@ -0,0 +1,92 @@
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+# Hamming distance (out of 64 bits) under which two dHashes count as the same picture
+DEFAULT_MAX_DISTANCE = 6
+
+
+def dhash(path: str, hash_size: int = 8) -> int:
+    """Difference hash: compares horizontally adjacent pixels of a tiny greyscale copy"""
+    with Image.open(path) as img:
+        # JPEG draft mode decodes at a reduced scale, far cheaper than a full decode
+        img.draft('L', (hash_size * 4, hash_size * 4))
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = list(small.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance
+
+    Each child edge is labelled with its distance to the parent, so a
+    search within `radius` only descends edges in [d - radius, d + radius].
+    """
+
+    def __init__(self, items: Iterable[int] = ()):
+        self.root = None  # (hash, {distance: child})
+        self.size = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, item: int):
+        self.size += 1
+        if self.root is None:
+            self.root = (item, {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(item, node[0])
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (item, {})
+                return
+            node = child
+
+    def search(self, item: int, radius: int) -> List[Tuple[int, int]]:
+        """All (distance, hash) pairs within radius of item, closest first"""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            value, children = stack.pop()
+            distance = hamming(item, value)
+            if distance <= radius:
+                matches.append((distance, value))
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return sorted(matches)
+
+    def __len__(self):
+        return self.size
+
+
+class NearDuplicateIndex:
+    """Thread-safe per-person set of perceptual hashes"""
+
+    def __init__(self, hashes: Iterable[int] = (), max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.tree = BKTree(hashes)
+        self._lock = threading.Lock()
+
+    def check_and_add(self, value: int) -> Optional[int]:
+        """Closest stored hash within max_distance, or None after adding value"""
+        with self._lock:
+            matches = self.tree.search(value, self.max_distance)
+            if matches:
+                return matches[0][1]
+            self.tree.add(value)
+            return None
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ImageStore:
+    """Content-addressed image store with per-person links
+
+    Image bytes live once under <root>/.objects/<ab>/<cd>/<sha256><ext>;
+    the files people see in <root> are symlinks (or hard links / copies
+    where symlinks are unavailable) pointing into it, and every saved image
+    is recorded in <root>/manifest.jsonl.
+    """
+
+    def __init__(self, root: str, objects_dir: str = ".objects"):
+        self.root = root
+        self.objects_root = os.path.join(root, objects_dir)
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self._lock = threading.Lock()
+        self._links = {}
+        self._files = {}
+        self._dhashes = defaultdict(list)
+        os.makedirs(self.objects_root, exist_ok=True)
+        self.load_manifest()
+
+    def load_manifest(self):
+        """Index existing (person, sha256) -> link entries from the manifest"""
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                link_path = os.path.join(self.root, entry['file'])
+                if os.path.lexists(link_path):
+                    self._links[(entry['person'], entry['sha256'])] = link_path
+                    self._files[entry['file']] = entry
+                    if entry.get('dhash'):
+                        self._dhashes[entry['person']].append(int(entry['dhash'], 16))
+
+    def object_path(self, digest: str, ext: str) -> str:
+        """Sharded location of an object"""
+        return os.path.join(self.objects_root, digest[:2], digest[2:4], digest + ext)
+
+    def write_temp(self, chunks: Iterable[bytes]) -> Tuple[str, str, int]:
+        """Write chunks to a temp file inside the store, returning (path, sha256, size)"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.objects_root, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        size += len(chunk)
+                        f.write(chunk)
+        except BaseException:
+            self.discard(temp_path)
+            raise
+        return temp_path, digest.hexdigest(), size
+
+    def commit(self, temp_path: str, digest: str, ext: str) -> Tuple[str, bool]:
+        """Move a temp file to its content address; returns (object_path, newly_stored)"""
+        path = self.object_path(digest, ext)
+        if os.path.exists(path):
+            self.discard(temp_path)
+            return path, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return path, True
+
+    def discard(self, temp_path: str):
+        """Remove a temp file (or an unreferenced object) if it still exists"""
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    def find_link(self, person: str, digest: str) -> Optional[str]:
+        """Existing link for this person and object, if any"""
+        with self._lock:
+            return self._links.get((person, digest))
+
+    def person_hashes(self, person: str) -> List[int]:
+        """Perceptual hashes of the images already linked for a person"""
+        with self._lock:
+            return list(self._dhashes.get(person, ()))
+
+    def link(self, object_path: str, link_path: str):
+        """Expose an object at link_path, preferring a relative symlink"""
+        target = os.path.relpath(object_path, os.path.dirname(link_path))
+        try:
+            os.symlink(target, link_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Windows without symlink privilege, or filesystems without symlinks
+            try:
+                os.link(object_path, link_path)
+            except OSError:
+                shutil.copyfile(object_path, link_path)
+
+    def record(self, entry: Dict):
+        """Append an entry (needs person, file and sha256 keys) to the manifest"""
+        entry = dict(entry, recorded_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        with self._lock:
+            self._links[(entry['person'], entry['sha256'])] = os.path.join(self.root, entry['file'])
+            self._files[entry['file']] = entry
+            if entry.get('dhash'):
+                self._dhashes[entry['person']].append(int(entry['dhash'], 16))
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def entry(self, path: str) -> Optional[Dict]:
+        """Manifest entry for a linked file in root, if recorded"""
+        with self._lock:
+            return self._files.get(os.path.relpath(path, self.root))
+
+    def unlink(self, path: str, object_path: str):
+        """Remove a link, and its object once no remaining link uses it"""
+        name = os.path.relpath(path, self.root)
+        with self._lock:
+            entry = self._files.pop(name, None)
+            if entry and self._links.get((entry['person'], entry['sha256'])) == os.path.join(self.root, name):
+                del self._links[(entry['person'], entry['sha256'])]
+            in_use = entry is None or any(digest == entry['sha256'] for _, digest in self._links)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if not in_use:
+            self.discard(object_path)
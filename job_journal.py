@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS people (
+    person   TEXT PRIMARY KEY,
+    status   TEXT NOT NULL,
+    result   TEXT,
+    updated  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    person      TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    candidates  TEXT NOT NULL,
+    updated     REAL NOT NULL,
+    PRIMARY KEY (person, source)
+);
+CREATE TABLE IF NOT EXISTS downloads (
+    person   TEXT NOT NULL,
+    url      TEXT NOT NULL,
+    path     TEXT NOT NULL,
+    updated  REAL NOT NULL,
+    PRIMARY KEY (person, url)
+);
+"""
+
+
+class JobJournal:
+    """Durable per-person progress for batch runs, so a restart resumes instead of refetching
+
+    Records which sources answered (with their candidates), which
+    candidates were saved and where, and which people are finished. The
+    database runs in WAL mode and every record is committed on its own, so
+    a crash loses at most the step in progress.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    @staticmethod
+    def person_key(person: Dict, fields) -> str:
+        """Stable identity for a person row: name plus every identifier given"""
+        return '|'.join((person.get(field) or '').strip() for field in fields)
+
+    def finished(self, person: str) -> Optional[Dict]:
+        """The stored result if person was completed by an earlier run"""
+        with self._lock:
+            row = self.db.execute("SELECT result FROM people WHERE person = ? AND status = 'done'",
+                                  (person,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def start(self, person: str):
+        with self._lock:
+            self.db.execute("INSERT INTO people (person, status, updated) VALUES (?, 'running', ?) "
+                            "ON CONFLICT(person) DO UPDATE SET status = 'running', updated = excluded.updated",
+                            (person, time.time()))
+
+    def finish(self, person: str, result: Dict):
+        with self._lock:
+            self.db.execute("UPDATE people SET status = 'done', result = ?, updated = ? WHERE person = ?",
+                            (json.dumps(result), time.time(), person))
+
+    def source_candidates(self, person: str) -> Dict[str, List[Dict]]:
+        """source label -> candidates, for every source that already answered"""
+        with self._lock:
+            rows = self.db.execute("SELECT source, candidates FROM sources WHERE person = ?",
+                                   (person,)).fetchall()
+        return {source: json.loads(candidates) for source, candidates in rows}
+
+    def record_source(self, person: str, source: str, candidates: List[Dict]):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO sources (person, source, candidates, updated) "
+                            "VALUES (?, ?, ?, ?)", (person, source, json.dumps(candidates), time.time()))
+
+    def downloads(self, person: str) -> Dict[str, str]:
+        """url -> saved path for downloads already completed, oldest first"""
+        with self._lock:
+            rows = self.db.execute("SELECT url, path FROM downloads WHERE person = ? ORDER BY updated", (person,)).fetchall()
+        return dict(rows)
+
+    def record_download(self, person: str, url: str, path: str):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO downloads (person, url, path, updated) VALUES (?, ?, ?, ?)",
+                            (person, url, path, time.time()))
+
+    def close(self):
+        with self._lock:
+            self.db.close()
@@ -1,15 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import requests
 import os
 import time
 import threading
-from urllib.parse import urljoin, urlparse, quote
-from bs4 import BeautifulSoup
-import hashlib
-import re
 import json
-from typing import List, Dict, Optional
+
+from gui_log import QueuedLogSink
+from scraper_engine import ScraperEngine
+from url_index import SeenUrlIndex
 
 class ModernProfileScraper:
     def __init__(self, root):
@@ -32,11 +30,14 @@ class ModernProfileScraper:
         }
         
         self.setup_styles()
-        self.setup_session()
         
         self.download_folder = "profile_images"
         self.is_scraping = False
-        self.scraped_urls = set()
+        # Image URLs handled in earlier sessions are skipped, so reruns only fetch what is new
+        self.engine = ScraperEngine(self.download_folder, log=self.log_message,
+                                    cache_dir=".http_cache", url_index=SeenUrlIndex(".seen_urls"))
+        self.session = self.engine.session
+        self.scraped_urls = self.engine.scraped_urls
         
         self.create_widgets()
     
@@ -72,22 +73,6 @@ class ModernProfileScraper:
                            font=('SF Pro Display', 10, 'bold'),
                            relief='flat', borderwidth=0)
     
-    def setup_session(self):
-        """Initialize session with rotating user agents"""
-        self.session = requests.Session()
-        self.user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-        ]
-        self.session.headers.update({
-            'User-Agent': self.user_agents[0],
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Connection': 'keep-alive',
-            'DNT': '1'
-        })
-    
     def create_widgets(self):
         """Create modern GUI"""
         # Main container with gradient effect
@@ -276,6 +261,9 @@ class ModernProfileScraper:
         self.log_text.tag_configure("error", foreground=self.colors['secondary'])
         self.log_text.tag_configure("warning", foreground=self.colors['warning'])
         self.log_text.tag_configure("info", foreground=self.colors['accent'])
+        
+        # Worker threads only enqueue; the Tk loop inserts lines in batches
+        self.log_sink = QueuedLogSink(self.root, self.log_text, self.render_log_line)
     
     def create_status_bar(self):
         """Create status bar"""
@@ -290,8 +278,11 @@ class ModernProfileScraper:
         status_label.pack(side=tk.LEFT, padx=15, pady=5)
     
     def log_message(self, message, level="info"):
-        """Add message to log"""
-        timestamp = time.strftime('%H:%M:%S')
+        """Add message to log (safe to call from the scraping thread)"""
+        self.log_sink.put(message, level)
+    
+    def render_log_line(self, timestamp, message, level):
+        """Format a queued log message with its icon and tag"""
         icons = {"success": "✅", "error": "❌", "warning": "⚠️", "info": "ℹ️"}
         
         if any(word in message.lower() for word in ['success', 'downloaded', 'found']):
@@ -301,10 +292,8 @@ class ModernProfileScraper:
         elif any(word in message.lower() for word in ['warning', 'skip']):
             level = "warning"
         
-        formatted_message = f"{timestamp} {icons[level]} {message}\n"
-        self.log_text.insert(tk.END, formatted_message, level)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        formatted_message = f"{time.strftime('%H:%M:%S', time.localtime(timestamp))} {icons.get(level, icons['info'])} {message}\n"
+        return formatted_message, level
     
     def browse_folder(self):
         """Browse for download folder"""
@@ -341,6 +330,7 @@ class ModernProfileScraper:
     def stop_scraping(self):
         """Stop scraping"""
         self.is_scraping = False
+        self.engine.stop()
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.progress.stop()
@@ -348,80 +338,19 @@ class ModernProfileScraper:
         self.log_message("Hunt stopped by user", "warning")
     
     def scrape_images(self, person_name):
-        """Main scraping logic"""
+        """Main scraping logic (delegates to the shared engine)"""
         try:
             self.download_folder = self.folder_var.get()
-            os.makedirs(self.download_folder, exist_ok=True)
-            
-            max_images = int(self.max_images_var.get() or 15)
-            self.scraped_urls.clear()
+            self.engine.download_folder = self.download_folder
+            self.engine.is_scraping = True
+            self.engine.scraped_urls.clear()
             
-            self.log_message(f"Starting hunt for: {person_name}")
-            self.log_message(f"Target: {max_images} images")
-            
-            all_images = []
-            
-            # 1. Scrape direct social media profiles
-            platforms = self.get_platform_info()
-            for platform, identifier in platforms.items():
-                if not self.is_scraping or len(all_images) >= max_images:
-                    break
-                
-                self.log_message(f"Scanning {platform}: {identifier}")
-                
-                try:
-                    images = getattr(self, f'scrape_{platform}')(identifier)
-                    if images:
-                        all_images.extend(images)
-                        self.log_message(f"Found {len(images)} from {platform}")
-                except Exception as e:
-                    self.log_message(f"{platform} error: {str(e)}", "error")
-                
-                time.sleep(0.5)
+            person = {'name': person_name, 'search_url': self.search_url_entry.get().strip()}
+            person.update(self.get_platform_info())
+            person['max_images'] = int(self.max_images_var.get() or 15)
             
-            # 2. Search custom URL if provided
-            search_url = self.search_url_entry.get().strip()
-            if self.is_scraping and search_url and len(all_images) < max_images:
-                self.log_message("Scanning custom search URL...")
-                try:
-                    custom_images = self.scrape_search_results(search_url)
-                    all_images.extend(custom_images)
-                    if custom_images:
-                        self.log_message(f"Found {len(custom_images)} from custom search")
-                except Exception as e:
-                    self.log_message(f"Custom URL error: {str(e)}", "error")
-            
-            # 3. Google Images search
-            if self.is_scraping and len(all_images) < max_images:
-                self.log_message("Searching Google Images...")
-                try:
-                    google_images = self.search_google_images(person_name, max_images - len(all_images))
-                    all_images.extend(google_images)
-                    if google_images:
-                        self.log_message(f"Found {len(google_images)} from Google Images")
-                except Exception as e:
-                    self.log_message(f"Google search error: {str(e)}", "error")
-            
-            # 4. DuckDuckGo Images search
-            if self.is_scraping and len(all_images) < max_images:
-                self.log_message("Searching DuckDuckGo Images...")
-                try:
-                    ddg_images = self.search_duckduckgo_images(person_name, max_images - len(all_images))
-                    all_images.extend(ddg_images)
-                    if ddg_images:
-                        self.log_message(f"Found {len(ddg_images)} from DuckDuckGo")
-                except Exception as e:
-                    self.log_message(f"DuckDuckGo error: {str(e)}", "error")
-            
-            # Download images
-            downloaded = 0
-            for i, img_info in enumerate(all_images[:max_images]):
-                if not self.is_scraping:
-                    break
-                
-                self.log_message(f"Downloading {i+1}/{len(all_images[:max_images])}: {img_info['source']}")
-                if self.download_image(img_info, person_name):
-                    downloaded += 1
+            result = self.engine.scrape_person(person)
+            downloaded = result['downloaded']
             
             if self.is_scraping:
                 self.log_message(f"Hunt completed! Downloaded {downloaded} images.")
@@ -454,321 +383,6 @@ class ModernProfileScraper:
         
         return platforms
     
-    def scrape_linkedin(self, profile_url):
-        """Enhanced LinkedIn scraping"""
-        images = []
-        try:
-            if not profile_url.startswith('http'):
-                profile_url = f"https://linkedin.com/in/{profile_url}"
-            
-            response = self.session.get(profile_url, timeout=15)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Multiple selectors for LinkedIn images
-                selectors = [
-                    'meta[property="og:image"]',
-                    'img[data-delayed-url*="profile-displayphoto"]',
-                    '.profile-photo img',
-                    '.pv-top-card__photo img'
-                ]
-                
-                for selector in selectors:
-                    elements = soup.select(selector)
-                    for el in elements:
-                        img_url = el.get('content') or el.get('src') or el.get('data-delayed-url')
-                        if img_url and 'media.licdn.com' in img_url and img_url not in self.scraped_urls:
-                            self.scraped_urls.add(img_url)
-                            images.append({
-                                'url': img_url,
-                                'source': 'LinkedIn',
-                                'platform': 'linkedin'
-                            })
-        except Exception as e:
-            self.log_message(f"LinkedIn error: {str(e)}", "error")
-        
-        return images
-    
-    def scrape_twitter(self, identifier):
-        """Enhanced Twitter scraping"""
-        images = []
-        username = identifier.replace('@', '').split('/')[-1]
-        
-        try:
-            for domain in ['x.com', 'twitter.com']:
-                url = f"https://{domain}/{username}"
-                response = self.session.get(url, timeout=15)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Multiple selectors for Twitter images
-                    selectors = [
-                        'meta[property="og:image"]',
-                        'img[src*="pbs.twimg.com/profile_images"]',
-                        'img[src*="profile_images"]'
-                    ]
-                    
-                    for selector in selectors:
-                        elements = soup.select(selector)
-                        for el in elements:
-                            img_url = el.get('content') or el.get('src')
-                            if img_url and 'pbs.twimg.com' in img_url and img_url not in self.scraped_urls:
-                                # Get higher quality version
-                                img_url = img_url.replace('_normal', '_400x400').replace('_bigger', '_400x400')
-                                self.scraped_urls.add(img_url)
-                                images.append({
-                                    'url': img_url,
-                                    'source': f'Twitter-{username}',
-                                    'platform': 'twitter'
-                                })
-                    break
-        except Exception as e:
-            self.log_message(f"Twitter error: {str(e)}", "error")
-        
-        return images
-    
-    def scrape_github(self, identifier):
-        """Enhanced GitHub scraping"""
-        images = []
-        username = identifier.split('/')[-1]
-        
-        try:
-            # Try API first
-            api_url = f"https://api.github.com/users/{username}"
-            response = self.session.get(api_url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                avatar_url = data.get('avatar_url')
-                if avatar_url and avatar_url not in self.scraped_urls:
-                    self.scraped_urls.add(avatar_url)
-                    images.append({
-                        'url': avatar_url + '?s=400',
-                        'source': f'GitHub-{username}',
-                        'platform': 'github'
-                    })
-        except Exception as e:
-            self.log_message(f"GitHub error: {str(e)}", "error")
-        
-        return images
-    
-    def scrape_website(self, url):
-        """Enhanced website scraping"""
-        images = []
-        try:
-            if not url.startswith('http'):
-                url = 'https://' + url
-            
-            response = self.session.get(url, timeout=15)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                selectors = [
-                    'meta[property="og:image"]',
-                    'img[alt*="profile" i]',
-                    'img[class*="avatar" i]',
-                    'img[class*="profile" i]',
-                    '.profile img',
-                    '.avatar img'
-                ]
-                
-                for selector in selectors:
-                    elements = soup.select(selector)
-                    for el in elements:
-                        img_url = el.get('content') or el.get('src')
-                        if img_url:
-                            if not img_url.startswith('http'):
-                                img_url = urljoin(url, img_url)
-                            
-                            if img_url not in self.scraped_urls:
-                                self.scraped_urls.add(img_url)
-                                images.append({
-                                    'url': img_url,
-                                    'source': f'Website-{urlparse(url).netloc}',
-                                    'platform': 'website'
-                                })
-        except Exception as e:
-            self.log_message(f"Website error: {str(e)}", "error")
-        
-        return images
-    
-    def scrape_search_results(self, search_url):
-        """Scrape images from search results page"""
-        images = []
-        try:
-            response = self.session.get(search_url, timeout=15)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Generic selectors for profile images in search results
-                selectors = [
-                    'img[src*="profile"]',
-                    'img[src*="avatar"]',
-                    'img[alt*="profile" i]',
-                    'img[class*="profile" i]',
-                    'img[class*="avatar" i]'
-                ]
-                
-                for selector in selectors:
-                    elements = soup.select(selector)
-                    for el in elements[:5]:  # Limit to avoid too many images
-                        img_url = el.get('src')
-                        if img_url and img_url not in self.scraped_urls:
-                            if not img_url.startswith('http'):
-                                img_url = urljoin(search_url, img_url)
-                            
-                            self.scraped_urls.add(img_url)
-                            images.append({
-                                'url': img_url,
-                                'source': 'Search Results',
-                                'platform': 'search'
-                            })
-        except Exception as e:
-            self.log_message(f"Search results error: {str(e)}", "error")
-        
-        return images
-    
-    def search_google_images(self, person_name, max_results):
-        """Search Google Images"""
-        images = []
-        try:
-            query = f"{person_name} profile picture"
-            search_url = f"https://www.google.com/search?q={quote(query)}&tbm=isch"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                # Extract image URLs from Google Images
-                img_urls = re.findall(r'"ou":"([^"]+)"', response.text)
-                
-                for img_url in img_urls[:max_results]:
-                    if img_url not in self.scraped_urls:
-                        self.scraped_urls.add(img_url)
-                        images.append({
-                            'url': img_url,
-                            'source': 'Google Images',
-                            'platform': 'google'
-                        })
-        except Exception as e:
-            self.log_message(f"Google Images error: {str(e)}", "error")
-        
-        return images
-    
-    def search_duckduckgo_images(self, person_name, max_results):
-        """Search DuckDuckGo Images"""
-        images = []
-        try:
-            query = f"{person_name} profile picture"
-            search_url = f"https://duckduckgo.com/?q={quote(query)}&t=h_&iax=images&ia=images"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                # Extract image URLs from DuckDuckGo
-                soup = BeautifulSoup(response.content, 'html.parser')
-                img_elements = soup.select('img[src]')
-                
-                for img in img_elements[:max_results]:
-                    img_url = img.get('src')
-                    if img_url and img_url.startswith('http') and img_url not in self.scraped_urls:
-                        self.scraped_urls.add(img_url)
-                        images.append({
-                            'url': img_url,
-                            'source': 'DuckDuckGo Images',
-                            'platform': 'duckduckgo'
-                        })
-        except Exception as e:
-            self.log_message(f"DuckDuckGo Images error: {str(e)}", "error")
-        
-        return images
-    
-    def download_image(self, img_info, person_name):
-        """Download individual image with enhanced error handling"""
-        try:
-            img_url = img_info['url']
-            source = img_info['source']
-            platform = img_info.get('platform', 'unknown')
-            
-            # Create safe filename
-            safe_name = re.sub(r'[^\w\s-]', '', person_name)
-            safe_name = re.sub(r'[-\s]+', '_', safe_name)
-            
-            # Generate unique filename
-            url_hash = hashlib.md5(img_url.encode()).hexdigest()[:8]
-            timestamp = int(time.time())
-            
-            # Determine file extension
-            response = self.session.head(img_url, timeout=10)
-            content_type = response.headers.get('content-type', '')
-            
-            if 'jpeg' in content_type or 'jpg' in content_type:
-                ext = '.jpg'
-            elif 'png' in content_type:
-                ext = '.png'
-            elif 'gif' in content_type:
-                ext = '.gif'
-            elif 'webp' in content_type:
-                ext = '.webp'
-            else:
-                # Try to guess from URL
-                if '.jpg' in img_url.lower() or '.jpeg' in img_url.lower():
-                    ext = '.jpg'
-                elif '.png' in img_url.lower():
-                    ext = '.png'
-                elif '.gif' in img_url.lower():
-                    ext = '.gif'
-                elif '.webp' in img_url.lower():
-                    ext = '.webp'
-                else:
-                    ext = '.jpg'  # Default
-            
-            filename = f"{safe_name}_{platform}_{url_hash}_{timestamp}{ext}"
-            filepath = os.path.join(self.download_folder, filename)
-            
-            # Download image
-            response = self.session.get(img_url, timeout=20, stream=True)
-            response.raise_for_status()
-            
-            # Check if it's actually an image
-            if not response.headers.get('content-type', '').startswith('image/'):
-                self.log_message(f"Skipped non-image: {source}", "warning")
-                return False
-            
-            # Save image
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            # Verify file size
-            if os.path.getsize(filepath) < 1024:  # Less than 1KB
-                os.remove(filepath)
-                self.log_message(f"Removed tiny file from {source}", "warning")
-                return False
-            
-            self.log_message(f"✅ Downloaded: {filename} from {source}")
-            return True
-            
-        except requests.exceptions.RequestException as e:
-            self.log_message(f"Download failed from {img_info['source']}: {str(e)}", "error")
-            return False
-        except Exception as e:
-            self.log_message(f"Unexpected error downloading from {img_info['source']}: {str(e)}", "error")
-            return False
-    
     def validate_inputs(self):
         """Validate user inputs"""
         name = self.name_entry.get().strip()
@@ -792,6 +406,7 @@ class ModernProfileScraper:
                 'download_folder': self.download_folder,
                 'total_images': len([f for f in os.listdir(self.download_folder) if f.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp'))]),
                 'scraped_urls': list(self.scraped_urls),
+                'seen_urls_total': len(self.engine.url_index.bloom),
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             
@@ -830,6 +445,7 @@ class ModernProfileScraper:
         if self.is_scraping:
             if messagebox.askokcancel("Quit", "Scraping is in progress. Do you want to quit?"):
                 self.is_scraping = False
+                self.engine.stop()
                 self.root.destroy()
         else:
             self.root.destroy()
@@ -860,6 +476,8 @@ def main():
     
     # Start the GUI event loop
     root.mainloop()
+    app.engine.close()
+    app.engine.url_index.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
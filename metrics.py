@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+# Seconds; covers cache hits through slow search pages and large downloads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metric:
+    """A named family of samples keyed by label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def label_text(self, key: Tuple[str, ...]) -> str:
+        """Label values joined for the JSON summary ('' when unlabelled)"""
+        return ','.join(f"{name}={value}" for name, value in zip(self.label_names, key))
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, format_labels(self.label_names, key), value)
+                    for key, value in sorted(self._values.items())]
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {self.label_text(key): value for key, value in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (not cumulative), count, sum, max
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+            state[3] = max(state[3], value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            for key, (counts, count, total, _) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append((f"{self.name}_bucket",
+                                  format_labels(self.label_names, key, f'le="{bound}"'), cumulative))
+                lines.append((f"{self.name}_bucket", format_labels(self.label_names, key, 'le="+Inf"'), count))
+                lines.append((f"{self.name}_sum", format_labels(self.label_names, key), round(total, 6)))
+                lines.append((f"{self.name}_count", format_labels(self.label_names, key), count))
+        return lines
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {self.label_text(key): {'count': count, 'sum': round(total, 4),
+                                           'mean': round(total / count, 4) if count else None,
+                                           'max': round(peak, 4)}
+                    for key, (_, count, total, peak) in sorted(self._values.items())}
+
+
+class Metrics:
+    """Registry of counters, gauges and histograms for one run"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.time()
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self.add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format, suitable for the node_exporter textfile collector"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> Dict:
+        return {'started': self.started, 'elapsed_seconds': round(time.time() - self.started, 3),
+                'metrics': {name: metric.summary() for name, metric in self.metrics.items()}}
+
+    def write_prometheus(self, path: str):
+        # Write then rename so a scraper never reads a half-written file
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(path + '.tmp', path)
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class ScrapeMetrics(Metrics):
+    """The instruments ScraperEngine records into"""
+
+    def __init__(self):
+        super().__init__()
+        self.request_seconds = self.histogram(
+            'scraper_http_request_seconds', "Time to response headers for network requests", ('host',))
+        self.responses = self.counter(
+            'scraper_http_responses_total', "HTTP responses by host and status", ('host', 'status'))
+        self.cache_hits = self.counter(
+            'scraper_http_cache_hits_total', "Responses answered from the HTTP cache", ('host',))
+        self.source_seconds = self.histogram(
+            'scraper_source_seconds', "Time for a source to return its candidates", ('source',))
+        self.candidates = self.counter(
+            'scraper_candidates_total', "Candidate image URLs found", ('source',))
+        self.source_errors = self.counter(
+            'scraper_source_errors_total', "Sources that raised instead of returning candidates", ('source',))
+        self.downloads = self.counter(
+            'scraper_downloads_total', "Images saved", ('platform',))
+        self.download_bytes = self.counter(
+            'scraper_download_bytes_total', "Image bytes downloaded", ('platform',))
+        self.download_seconds = self.histogram(
+            'scraper_download_seconds', "Time per image download, saved or rejected", ('platform',))
+        self.rejects = self.counter(
+            'scraper_download_rejects_total', "Downloads discarded, by reason", ('reason',))
+        self.seen_skips = self.counter(
+            'scraper_seen_skips_total', "Candidates skipped because an earlier run handled their URL")
+        self.people = self.counter('scraper_people_total', "People scraped")
+        self.person_seconds = self.histogram(
+            'scraper_person_seconds', "Wall time per person", buckets=(1, 2.5, 5, 10, 30, 60, 120, 300))
+        self.connections = self.gauge(
+            'scraper_http_connections_opened', "Connections opened to each host over the run", ('host',))
+        self.pooled_requests = self.gauge(
+            'scraper_http_pooled_requests', "Requests sent over each host's connection pool", ('host',))
+        self.rate_limit_wait = self.gauge(
+            'scraper_rate_limit_wait_seconds', "Total time spent waiting for rate-limit tokens")
+
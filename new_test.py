@@ -1,43 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import requests, os, time, threading, re, hashlib, webbrowser
-from urllib.parse import quote
-from bs4 import BeautifulSoup
-
-# ---------- helpers --------------------------------------------------------- #
-HEADERS = {
-    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                   "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36")
-}
-SKIP_TERMS = {'logo', 'icon', 'banner', 'button', 'ad', 'gstatic', 'google'}
-IMG_EXT_RE = re.compile(r'\.(jpe?g|png|gif|webp)(\?|$)', re.I)
-URL_RE = re.compile(r'https://[^"\'>\s]+\.(?:jpg|jpeg|png|gif|webp)', re.I)
-
-def valid_img(url: str) -> bool:
-    return (url.startswith('http')
-            and IMG_EXT_RE.search(url)
-            and not any(t in url.lower() for t in SKIP_TERMS))
-
-def fetch(url, session, **kw):
-    try:
-        return session.get(url, timeout=10, **kw)
-    except Exception:
-        return None
-
-def extract_imgs(text: str) -> list[str]:
-    return [u for u in URL_RE.findall(text) if valid_img(u)]
+import os, time, threading, webbrowser
+
+from gui_log import QueuedLogSink
+from http_session import connection_stats, format_connection_stats
+from scraper_engine import ScraperEngine
+
 
 # ---------- GUI class ------------------------------------------------------- #
 class ScraperGUI:
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("Profile Image Scraper")
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-
         self.running = tk.BooleanVar(value=False)
         self.folder = tk.StringVar(value=os.path.join(os.getcwd(), "profile_images"))
         self.max_imgs = tk.IntVar(value=5)
+        # the shared engine, plus Medium and Substack pages found through Google site: searches
+        self.engine = ScraperEngine(self.folder.get(), log=self.log,
+                                    extra_sources=('medium', 'substack'))
+        self.session = self.engine.session
 
         self.build_ui()
 
@@ -68,6 +49,8 @@ class ScraperGUI:
         self.prog = ttk.Progressbar(f, mode="indeterminate"); self.prog.pack(fill=tk.X, pady=4)
         self.logbox = scrolledtext.ScrolledText(f, height=12, font=("Consolas", 9))
         self.logbox.pack(fill=tk.BOTH, expand=True)
+        self.log_sink = QueuedLogSink(self.root, self.logbox, lambda ts, msg, lvl: (
+            f"{time.strftime('%H:%M:%S', time.localtime(ts))}  {msg}\n", None))
 
     def _entry_row(self, parent, label, row, var=None, width=40, browse=False):
         ttk.Label(parent, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
@@ -90,6 +73,7 @@ class ScraperGUI:
 
     def stop(self):
         self.running.set(False)
+        self.engine.stop()
 
     def open_folder(self):
         path = self.folder.get()
@@ -104,91 +88,23 @@ class ScraperGUI:
     # --------------------------- worker ------------------------------------ #
     def worker(self):
         self.log("Scraping started")
-        dest_dir = os.path.join(self.folder.get(), self.name.get().strip().replace(' ', '_'))
-        os.makedirs(dest_dir, exist_ok=True)
-
-        searches = [
-            self.linkedin_image,
-            lambda: self.search_google(f'"{self.name.get()}" profile picture {self.compan.get()}'),
-            lambda: self.search_duckduckgo(f'"{self.name.get()}" headshot {self.compan.get()}'),
-            lambda: self.search_site('medium.com', "Medium"),
-            lambda: self.search_site('substack.com', "Substack")
-        ]
-
-        found = []
-        for fn in searches:
-            if not self.running.get() or len(found) >= self.max_imgs.get(): break
-            imgs = fn() or []
-            found.extend(imgs[: self.max_imgs.get() - len(found)])
-
-        downloaded = sum(self.download(i, dest_dir) for i in found)
-        self.log(f"Finished – downloaded {downloaded}/{self.max_imgs.get()} images")
+        self.engine.download_folder = self.folder.get()
+        self.engine.is_scraping = True
+        self.engine.scraped_urls.clear()
+        try:
+            result = self.engine.scrape_person({'name': self.name.get().strip(),
+                                                'linkedin': self.lnkurl.get().strip(),
+                                                'company': self.compan.get().strip(),
+                                                'max_images': self.max_imgs.get()})
+            self.log(f"Finished – downloaded {result['downloaded']}/{self.max_imgs.get()} images")
+        except Exception as e:                  # keep the buttons usable after a failed run
+            self.log(f"Error: {e}")
+        self.log("Connections: " + format_connection_stats(connection_stats(self.session)))
         self.done()
 
-    # ------------------------- search funcs -------------------------------- #
-    def linkedin_image(self):
-        url = self.lnkurl.get().strip()
-        if not url: return []
-        r = fetch(url, self.session)
-        if not r or r.status_code != 200: return []
-        soup = BeautifulSoup(r.text, 'html.parser')
-        for sel in ('meta[property="og:image"]', 'img[src*="profile"]'):
-            tag = soup.select_one(sel)
-            src = tag.get("content") if tag and tag.name == "meta" else tag.get("src") if tag else ""
-            if valid_img(src):
-                self.log("LinkedIn image found")
-                return [("LinkedIn", src)]
-        return []
-
-    def search_google(self, q):
-        self.log("Google…")
-        r = fetch(f"https://www.google.com/search?q={quote(q)}&tbm=isch&safe=off", self.session)
-        return [("Google", u) for u in extract_imgs(r.text)] if r else []
-
-    def search_duckduckgo(self, q):
-        self.log("DuckDuckGo…")
-        r = fetch("https://duckduckgo.com/html/", self.session, params={"q": q, "iax": "images", "ia": "images"})
-        return [("DuckDuckGo", u) for u in extract_imgs(r.text)] if r else []
-
-    def search_site(self, domain, label):
-        self.log(f"{label}…")
-        r = fetch(f"https://www.google.com/search?q=site:{domain}+{quote(self.name.get())}", self.session)
-        if not r: return []
-        soup = BeautifulSoup(r.text, 'html.parser')
-        links = [a["href"] for a in soup.select("a[href]") if domain in a["href"]]
-        for link in links[:3]:          # keep it quick
-            rr = fetch(link, self.session)
-            if rr and rr.status_code == 200:
-                imgs = extract_imgs(rr.text)
-                if imgs:
-                    return [(label, imgs[0])]
-        return []
-
-    # --------------------------- download ---------------------------------- #
-    def download(self, src_tuple, dest_dir):
-        label, url = src_tuple
-        if not self.running.get(): return 0
-        r = fetch(url, self.session, stream=True)
-        if not r or 'image' not in r.headers.get("content-type", ""): return 0
-
-        ext = '.png' if 'png' in r.headers['content-type'] else '.gif' if 'gif' in r.headers['content-type'] else '.jpg'
-        fname = f"{label}_{hashlib.md5(url.encode()).hexdigest()[:8]}{ext}"
-        path = os.path.join(dest_dir, fname)
-
-        with open(path, 'wb') as f:
-            for chunk in r.iter_content(8192):
-                if not self.running.get(): return 0
-                f.write(chunk)
-
-        if os.path.getsize(path) < 1024:  # toss tiny junk
-            os.remove(path); return 0
-        self.log(f"✓ {label}")
-        return 1
-
     # --------------------------- utils ------------------------------------ #
-    def log(self, msg):                             # timestamped log
-        self.logbox.insert(tk.END, f"{time.strftime('%H:%M:%S')}  {msg}\n")
-        self.logbox.see(tk.END)
+    def log(self, msg, lvl="info"):                 # timestamped log, any thread
+        self.log_sink.put(msg, lvl)
 
     def done(self):
         self.running.set(False)
@@ -198,6 +114,7 @@ class ScraperGUI:
 if __name__ == "__main__":
     tk.Tk().withdraw()   # prevent initial flash on macOS
     root = tk.Tk()
-    ScraperGUI(root)
+    app = ScraperGUI(root)
     root.mainloop()
+    app.engine.close()
 
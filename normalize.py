@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from image_store import ImageStore
+from process_pool import ProcessStage
+
+DEFAULT_MAX_SIDE = 1024
+DEFAULT_QUALITY = 80
+FORMATS = {'webp': ('WEBP', '.webp'), 'avif': ('AVIF', '.avif')}
+
+
+def resolve_format(name: str = 'auto') -> str:
+    """'webp' or 'avif'; 'auto' picks AVIF when this Pillow can encode it"""
+    if name == 'auto':
+        return 'avif' if features.check('avif') else 'webp'
+    if name not in FORMATS:
+        raise ValueError(f"unknown image format {name!r} (expected auto, webp or avif)")
+    if name == 'avif' and not features.check('avif'):
+        raise ValueError("this Pillow build cannot encode AVIF")
+    return name
+
+
+def normalize_image(source: str, temp_dir: str, max_side: int = DEFAULT_MAX_SIDE,
+                    quality: int = DEFAULT_QUALITY, fmt: str = 'webp') -> Optional[Tuple[str, str, int]]:
+    """Re-encode source into temp_dir as (temp_path, sha256, size)
+
+    The longest side is capped at max_side and EXIF/ICC/XMP metadata is
+    dropped (orientation is applied first). Returns None when the result
+    would not be smaller and no resize was needed, or for animations.
+    """
+    pil_format, ext = FORMATS[fmt]
+    original_size = os.path.getsize(source)
+    with Image.open(source) as img:
+        if getattr(img, 'is_animated', False):
+            return None
+        resized = max(img.size) > max_side
+        img.draft('RGB', (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        if img.mode not in ('RGB', 'RGBA'):
+            has_alpha = img.mode in ('LA', 'PA') or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+        img.info.clear()
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix=ext + ".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, pil_format, quality=quality)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    size = os.path.getsize(temp_path)
+    if size >= original_size and not resized:
+        os.remove(temp_path)
+        return None
+    digest = hashlib.sha256()
+    with open(temp_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return temp_path, digest.hexdigest(), size
+
+
+def _normalize_job(job: Tuple) -> Tuple[Optional[Tuple[str, str, int]], Optional[str]]:
+    """Process pool entry point: (result, None) or (None, error)"""
+    try:
+        return normalize_image(*job), None
+    except Exception as e:
+        return None, str(e)
+
+
+class NormalizeStage(ProcessStage):
+    """Optional post-download re-encode to capped-size WebP/AVIF across all cores
+
+    Normalized bytes become new objects in the image store and the
+    person's link is replaced by one with the new extension. With
+    keep_original the original link (and object) stay alongside.
+    """
+
+    def __init__(self, store: ImageStore, max_side: int = DEFAULT_MAX_SIDE, quality: int = DEFAULT_QUALITY,
+                 fmt: str = 'auto', keep_original: bool = False, workers: Optional[int] = None):
+        super().__init__(workers)
+        self.store = store
+        self.max_side = max_side
+        self.quality = quality
+        self.fmt = resolve_format(fmt)
+        self.keep_original = keep_original
+
+    def run(self, paths: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """Normalize saved links; returns (paths now saved, {old path: new path})"""
+        ext = FORMATS[self.fmt][1]
+        todo = [path for path in paths if not path.endswith(ext) and self.store.entry(path)]
+        jobs = [(path, self.store.objects_root, self.max_side, self.quality, self.fmt) for path in todo]
+        replaced = {}
+        for path, (result, _) in zip(todo, self.map_jobs(_normalize_job, jobs)):
+            if result is not None:
+                replaced[path] = self.replace(path, *result)
+        return [replaced.get(path, path) for path in paths], replaced
+
+    def replace(self, path: str, temp_path: str, digest: str, size: int) -> str:
+        """Store normalized bytes and link them in place of path"""
+        entry = self.store.entry(path)
+        object_path, _ = self.store.commit(temp_path, digest, FORMATS[self.fmt][1])
+        new_path = os.path.splitext(path)[0] + FORMATS[self.fmt][1]
+        self.store.link(object_path, new_path)
+        self.store.record(dict(entry, file=os.path.relpath(new_path, self.store.root), sha256=digest,
+                               size=size, original_sha256=entry['sha256'], original_size=entry['size']))
+        if not self.keep_original:
+            original_ext = os.path.splitext(path)[1]
+            self.store.unlink(path, self.store.object_path(entry['sha256'], original_ext))
+        return new_path
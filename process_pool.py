@@ -0,0 +1,43 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional, Sequence
+
+
+class ProcessStage:
+    """Base for CPU-bound post-download stages run across all cores
+
+    The pool is created on first use with the spawn start method (forking
+    a process that runs download threads is unsafe) and shut down by
+    close(). fn must be a picklable module-level function.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def map_jobs(self, fn: Callable, jobs: Sequence) -> List:
+        """fn(job) for every job, in order; single jobs run inline"""
+        if len(jobs) > 1 and self.workers > 1:
+            chunksize = max(1, len(jobs) // (self.workers * 4))
+            try:
+                return list(self.pool().map(fn, jobs, chunksize=chunksize))
+            except BrokenProcessPool:
+                # Workers could not start (e.g. an unimportable __main__); finish inline
+                self.close()
+        return [fn(job) for job in jobs]
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,99 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Base score by where a candidate came from: direct profiles are nearly
+# always the person, search results often are not. Keys are matched against
+# the candidate's platform, then as substrings of its source label.
+SOURCE_SCORES = {
+    'linkedin': 3.0,
+    'twitter': 2.5,
+    'x.com': 2.5,
+    'github': 2.0,
+    'website': 1.5,
+    'search': 1.0,
+    'google': 0.5,
+    'duckduckgo': 0.5,
+    'bing': 0.5,
+    'medium': 1.0,
+    'substack': 1.0,
+}
+DEFAULT_SOURCE_SCORE = 0.5
+
+# Substrings of a URL that mark a profile photo, or a thumbnail / site chrome
+GOOD_URL_HINTS = ('_400x400', 'profile-displayphoto', 'profile_images', 'avatars.githubusercontent',
+                  'headshot', 'avatar', 'portrait')
+BAD_URL_HINTS = ('_normal.', '_mini.', '_bigger.', 'encrypted-tbn', 'gstatic.com', 'thumb', 'icon',
+                 'logo', 'sprite', 'favicon', 'banner', 'placeholder', 'default_profile')
+
+# Sizes spelled out in URLs: 400x400, shrink_800_800, ?s=460, &width=800, /s400/, =s96-c
+SIZE_IN_URL = re.compile(r'(?:(?<![\d.])(\d{2,4})x(\d{2,4})(?!\d)'
+                         r'|shrink_(\d{2,4})_(\d{2,4})'
+                         r'|[?&](?:s|sz|size|w|width)=(\d{2,4})(?!\d)'
+                         r'|[/=]s(\d{2,4})(?:-c)?(?:/|$))', re.I)
+SIZE_TOKENS = re.compile(r'(_normal|_mini|_bigger|_\d{2,4}x\d{2,4}|-\d{2,4}x\d{2,4}|/s\d{2,4}(?:-c)?(?=/))', re.I)
+
+
+def source_score(img: Dict) -> float:
+    platform = (img.get('platform') or '').lower()
+    if platform in SOURCE_SCORES:
+        return SOURCE_SCORES[platform]
+    source = (img.get('source') or '').lower()
+    return next((score for key, score in SOURCE_SCORES.items() if key in source), DEFAULT_SOURCE_SCORE)
+
+
+def known_side(img: Dict) -> Optional[int]:
+    """Shorter side in pixels, from the candidate's width/height or sizes in its URL"""
+    if img.get('width') and img.get('height'):
+        return min(int(img['width']), int(img['height']))
+    match = SIZE_IN_URL.search(img['url'])
+    if not match:
+        return None
+    numbers = [int(group) for group in match.groups() if group]
+    return min(numbers)
+
+
+def image_key(url: str) -> str:
+    """The same picture at another size or with another query string maps to one key"""
+    parts = urlsplit(url)
+    return parts.netloc.lower() + SIZE_TOKENS.sub('', parts.path).lower()
+
+
+def score_candidate(img: Dict, sources_sharing: int = 1) -> float:
+    """Higher is more likely to be a usable photo of the person"""
+    score = source_score(img)
+    url = img['url'].lower()
+    if 'og:image' in (img.get('rule') or ''):
+        score += 0.5
+    if any(hint in url for hint in GOOD_URL_HINTS):
+        score += 1.0
+    if any(hint in url for hint in BAD_URL_HINTS):
+        score -= 1.5
+    side = known_side(img)
+    if side is not None:
+        score += 1.0 if side >= 400 else 0.5 if side >= 200 else -1.0 if side < 128 else 0
+    # Independent sources agreeing on an image is strong evidence it is the person
+    score += 0.75 * min(sources_sharing - 1, 2)
+    return round(score, 2)
+
+
+def rank_candidates(images: List[Dict], min_score: Optional[float] = None) -> List[Dict]:
+    """Candidates best first, each with a 'score'; ties keep discovery order
+
+    A URL listed by several sources is kept once, at its first position.
+    With min_score, candidates scoring below it are dropped.
+    """
+    sources_by_key = defaultdict(set)
+    unique = {}
+    for img in images:
+        sources_by_key[image_key(img['url'])].add(img.get('source'))
+        unique.setdefault(img['url'], img)
+    scored = []
+    for img in unique.values():
+        sharing = len(sources_by_key[image_key(img['url'])])
+        scored.append(dict(img, score=score_candidate(img, sharing)))
+    scored.sort(key=lambda img: -img['score'])
+    if min_score is not None:
+        scored = [img for img in scored if img['score'] >= min_score]
+    return scored
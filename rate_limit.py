@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+# Requests per second and burst size per host; subdomains inherit their parent's entry
+DEFAULT_RATES = {
+    'google.com': (0.5, 1),
+    'duckduckgo.com': (1.0, 1),
+    'bing.com': (1.0, 1),
+    'linkedin.com': (1.0, 2),
+    'x.com': (1.0, 2),
+    'twitter.com': (1.0, 2),
+    'api.github.com': (2.0, 5),
+}
+DEFAULT_HOST_RATE = (5.0, 10)
+
+# Per thread: an Event that, once set, ends the thread's rate-limit wait
+_cancel = threading.local()
+
+
+class RequestCancelled(Exception):
+    """Raised from HostRateLimiter.wait when the caller gave up before its turn came"""
+
+
+def run_cancellable(cancelled: threading.Event, fn: Callable):
+    """Call fn with this thread's rate-limit waits ending early once cancelled is set
+
+    A request still waiting for its token then raises RequestCancelled
+    instead of going out.
+    """
+    _cancel.event = cancelled
+    try:
+        return fn()
+    finally:
+        _cancel.event = None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self):
+        """Return a reserved token that was never used"""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, configured by domain suffix"""
+
+    def __init__(self, rates: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default: Tuple[float, int] = DEFAULT_HOST_RATE):
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.default = default
+        self.waited = 0.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def rate_for(self, host: str) -> Tuple[float, int]:
+        """Most specific configured rate for host (www.google.com -> google.com)"""
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            rate = self.rates.get('.'.join(parts[i:]))
+            if rate:
+                return rate
+        return self.default
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(*self.rate_for(host))
+                self._buckets[host] = bucket
+            return bucket
+
+    def wait(self, url: str):
+        """Block until a request to url's host is allowed
+
+        Under run_cancellable, raises RequestCancelled (and gives the token
+        back) if the caller cancels before or during the wait.
+        """
+        host = (urlparse(url).hostname or '').lower()
+        bucket = self.bucket(host)
+        delay = bucket.reserve()
+        cancelled = getattr(_cancel, 'event', None)
+        if delay > 0:
+            started = time.monotonic()
+            if cancelled is None:
+                time.sleep(delay)
+            else:
+                cancelled.wait(delay)
+            with self._lock:
+                self.waited += time.monotonic() - started
+        if cancelled is not None and cancelled.is_set():
+            bucket.refund()
+            raise RequestCancelled(url)
+
+
+def parse_rate(spec: str) -> Tuple[str, Tuple[float, int]]:
+    """Parse 'host=rate[:burst]' from the command line"""
+    host, _, value = spec.partition('=')
+    rate, _, burst = value.partition(':')
+    if not host or not rate:
+        raise ValueError(f"expected host=rate[:burst], got {spec!r}")
+    return host.strip().lower(), (float(rate), int(burst or 1))
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that waits for the host's token before touching the network"""
+
+    def __init__(self, limiter: Optional[HostRateLimiter] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def send(self, request, **kwargs):
+        if self.limiter:
+            self.limiter.wait(request.url)
+        return super().send(request, **kwargs)
@@ -0,0 +1,1373 @@
+import argparse
+import asyncio
+import csv
+import functools
+import io
+import itertools
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+import requests
+from PIL import Image
+
+from extract_rules import (extract_head_image_urls, extract_image_urls, extract_result_links,
+                           extract_search_urls)
+from html_parse import STREAM_CHUNK
+from http_cache import finish_for_cache
+from http_session import (USER_AGENTS, build_session, connection_stats, format_connection_stats,
+                          session_cache)
+from image_hash import DEFAULT_MAX_DISTANCE, NearDuplicateIndex, dhash
+from image_store import ImageStore
+from job_journal import JobJournal
+from metrics import ScrapeMetrics
+from normalize import DEFAULT_MAX_SIDE, DEFAULT_QUALITY, NormalizeStage, resolve_format
+from ranking import rank_candidates
+from rate_limit import DEFAULT_RATES, HostRateLimiter, parse_rate, run_cancellable
+from thumbnails import DEFAULT_THUMB_SIZE, ThumbnailStage
+from url_index import DEFAULT_CAPACITY, SeenUrlIndex, UnseenSet
+
+# Columns accepted in a person list; only 'name' is required
+PERSON_FIELDS = ['name', 'twitter', 'github', 'linkedin', 'website', 'company', 'search_url']
+PLATFORMS = ['linkedin', 'twitter', 'github', 'website']
+
+# Opt-in sources on top of the profile pages, Google and DuckDuckGo: Bing
+# Images, and Google site: searches whose first few result pages are read
+# for a picture (name -> (domain, label))
+SITE_SEARCHES = {'medium': ('medium.com', 'Medium'), 'substack': ('substack.com', 'Substack')}
+EXTRA_SOURCES = ['bing'] + list(SITE_SEARCHES)
+SITE_SEARCH_PAGES = 3
+
+# Concurrent downloads allowed per image host; unlisted hosts use the pool default
+DEFAULT_HOST_LIMITS = {
+    'pbs.twimg.com': 4,
+    'media.licdn.com': 4,
+    'avatars.githubusercontent.com': 4,
+}
+
+
+# Bytes needed to recognise every signature in sniff_image_type
+SNIFF_BYTES = 32
+
+# Smaller bodies are icons, spacers or error stubs; larger ones are not profile photos
+MIN_IMAGE_BYTES = 1024
+DEFAULT_MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+# Dimension probe: how far into a body to look for the size header (JPEG
+# EXIF blocks can push it past 32 KB), the smallest usable side, and the
+# width/height range of headshots (portrait up to slightly landscape)
+PROBE_BYTES = 64 * 1024
+DEFAULT_MIN_SIDE = 128
+DEFAULT_ASPECT_RANGE = (0.4, 1.5)
+PIL_FORMATS = {'.jpg': 'JPEG', '.png': 'PNG', '.gif': 'GIF', '.webp': 'WEBP', '.avif': 'AVIF'}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Return the file extension for an image's leading bytes, or None if not an image"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return '.gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    if head[4:8] == b'ftyp' and head[8:12] in (b'avif', b'avis'):
+        return '.avif'
+    return None
+
+
+class ImageRejected(Exception):
+    """A candidate turned down from its headers or first bytes, before anything is written"""
+
+    def __init__(self, reason: str, detail: str = ''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+def read_image_head(response: requests.Response, size: int = SNIFF_BYTES, chunks=None,
+                    min_bytes: int = 0, max_bytes: Optional[int] = None):
+    """Buffer the start of a streamed response and sniff its image type
+
+    Returns (ext, head, chunks) where chunks yields the rest of the body, so
+    the caller can write head followed by chunks without a second request.
+    Pass `chunks` (e.g. from resumable_chunks) to read from that instead.
+
+    Bodies under min_bytes (by Content-Length, or by ending within the
+    buffered head) and over max_bytes (by Content-Length, or once the
+    stream passes it) raise ImageRejected('tiny' / 'oversized').
+    """
+    if chunks is None:
+        chunks = response.iter_content(chunk_size=8192)
+    try:
+        declared = body_length(response)
+        if declared is not None and declared < min_bytes:
+            raise ImageRejected('tiny', f"{declared} bytes")
+        if declared is not None and max_bytes and declared > max_bytes:
+            raise ImageRejected('oversized', f"{declared} bytes")
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= max(size, min_bytes):
+                break
+        else:
+            if len(head) < min_bytes:
+                raise ImageRejected('tiny', f"{len(head)} bytes")
+    except BaseException:
+        close_chunks(chunks, response)
+        raise
+    if max_bytes:
+        chunks = limit_bytes(chunks, max_bytes - len(head), response)
+    return sniff_image_type(head), head, chunks
+
+
+def limit_bytes(chunks, remaining: int, response: Optional[requests.Response] = None):
+    """Pass chunks through, raising ImageRejected('oversized') once more than remaining arrive"""
+    try:
+        for chunk in chunks:
+            remaining -= len(chunk)
+            if remaining < 0:
+                raise ImageRejected('oversized', "body exceeds the size limit")
+            yield chunk
+    finally:
+        close_chunks(chunks, response)
+
+
+def close_chunks(chunks, response: Optional[requests.Response] = None):
+    """Stop a body iterator and release its connection"""
+    close = getattr(chunks, 'close', None)
+    if close:
+        close()
+    if response is not None:
+        response.close()
+
+
+def webp_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """Canvas size from a WebP's first chunk header (VP8, VP8L or VP8X, within 30 bytes)"""
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b'VP8X':
+        return 1 + int.from_bytes(head[24:27], 'little'), 1 + int.from_bytes(head[27:30], 'little')
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3fff, height & 0x3fff
+    if chunk == b'VP8L' and head[20] == 0x2f:
+        bits = int.from_bytes(head[21:25], 'little')
+        return 1 + (bits & 0x3fff), 1 + (bits >> 14 & 0x3fff)
+    return None
+
+
+def avif_size(head: bytes) -> Optional[Tuple[int, int]]:
+    """Largest 'ispe' (image spatial extents) in an AVIF's meta box, once the box is buffered
+
+    Grid images list their tiles' extents too; the largest is the canvas.
+    """
+    offset = 0
+    while offset + 8 <= len(head):
+        size, kind = struct.unpack('>I4s', head[offset:offset + 8])
+        if size == 1 and offset + 16 <= len(head):
+            size = struct.unpack('>Q', head[offset + 8:offset + 16])[0]
+        if kind == b'meta':
+            box = head[offset:offset + size]
+            if len(box) < size:
+                return None
+            # ispe: type, version/flags, then 32-bit width and height
+            sizes = [struct.unpack('>II', box[m.start() + 8:m.start() + 16])
+                     for m in re.finditer(b'ispe', box) if m.start() + 16 <= len(box)]
+            return max(sizes, key=lambda wh: wh[0] * wh[1]) if sizes else None
+        if size < 8:
+            return None
+        offset += size
+    return None
+
+
+# Formats whose size is read straight from the header: Pillow's WebP plugin
+# needs the whole file, and AVIF support depends on the Pillow build
+HEADER_SIZE_READERS = {'.webp': webp_size, '.avif': avif_size}
+
+
+def probe_dimensions(ext: str, head: bytes, chunks, limit: int = PROBE_BYTES):
+    """Read the image size from the start of the body without decoding it
+
+    Pulls further chunks only until the header parse succeeds (our own for
+    WebP and AVIF, Pillow's lazy open otherwise) or limit bytes are
+    buffered. Returns ((width, height) or None, head).
+    """
+    formats = [PIL_FORMATS[ext]] if ext in PIL_FORMATS else None
+    read_size = HEADER_SIZE_READERS.get(ext)
+    while True:
+        if read_size:
+            size = read_size(head)
+            if size:
+                return size, head
+        else:
+            try:
+                with Image.open(io.BytesIO(head), formats=formats) as img:
+                    return img.size, head
+            except Exception:
+                pass  # header not complete yet, or a format Pillow cannot read
+        if len(head) >= limit:
+            return None, head
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None, head
+        head += chunk
+
+
+def check_dimensions(size: Optional[Tuple[int, int]], min_side: int = DEFAULT_MIN_SIDE,
+                     aspect_range: Optional[Tuple[float, float]] = DEFAULT_ASPECT_RANGE):
+    """Raise ImageRejected for icons, thumbnails and banner-shaped images (unknown sizes pass)"""
+    if size is None:
+        return
+    width, height = size
+    if min(width, height) < min_side:
+        raise ImageRejected('small', f"{width}x{height}")
+    if aspect_range and not aspect_range[0] <= width / height <= aspect_range[1]:
+        raise ImageRejected('aspect', f"{width}x{height}")
+
+
+def read_checked_head(response: requests.Response, chunks=None, min_bytes: int = MIN_IMAGE_BYTES,
+                      max_bytes: Optional[int] = DEFAULT_MAX_IMAGE_BYTES, min_side: int = DEFAULT_MIN_SIDE,
+                      aspect_range: Optional[Tuple[float, float]] = DEFAULT_ASPECT_RANGE):
+    """read_image_head plus the dimension probe: (ext, head, chunks, (width, height) or None)
+
+    A rejected image's stream is closed after at most PROBE_BYTES, so
+    icons and search thumbnails never take a full download.
+    """
+    ext, head, chunks = read_image_head(response, chunks=chunks, min_bytes=min_bytes, max_bytes=max_bytes)
+    if not ext:
+        return ext, head, chunks, None
+    try:
+        size, head = probe_dimensions(ext, head, chunks)
+        check_dimensions(size, min_side, aspect_range)
+    except BaseException:
+        close_chunks(chunks, response)
+        raise
+    return ext, head, chunks, size
+
+
+class SourceUnavailable(Exception):
+    """A source answered with a rate limit or server error rather than a result"""
+
+
+def check_source_status(status: int, url: str):
+    """Raise SourceUnavailable for answers worth retrying later (429 and 5xx)"""
+    if status == 429 or status >= 500:
+        raise SourceUnavailable(f"HTTP {status} from {url}")
+
+
+class DownloadCancelled(Exception):
+    """Raised from resumable_chunks when the caller asks to stop"""
+
+
+class IncompleteDownload(requests.exceptions.RequestException):
+    """The body could not be completed, or its length does not match the headers"""
+
+
+# Mid-body failures worth resuming from the last byte received
+RESUMABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout)
+
+
+def body_length(response: requests.Response) -> Optional[int]:
+    """Full entity size from Content-Range or Content-Length, if it can be checked"""
+    if response.headers.get('Content-Encoding', 'identity').lower() != 'identity':
+        return None  # iter_content yields decoded bytes, which will not match
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def range_start(response: requests.Response) -> Optional[int]:
+    """First byte of a 206 response, from 'Content-Range: bytes start-end/total'"""
+    content_range = response.headers.get('Content-Range', '')
+    if not content_range.startswith('bytes '):
+        return None
+    start = content_range[6:].split('-', 1)[0]
+    return int(start) if start.isdigit() else None
+
+
+def resumable_chunks(session: requests.Session, response: requests.Response, timeout: float = 20,
+                     retries: int = 3, should_continue: Optional[Callable] = None,
+                     chunk_size: int = 8192):
+    """Yield a streamed response body, resuming with Range requests after transient errors
+
+    Resumption sends If-Range with the original validator so a changed
+    image is never spliced onto the old bytes. Raises DownloadCancelled once
+    should_continue() is false, and IncompleteDownload when the body cannot
+    be finished or its length differs from what the server announced.
+    """
+    url = response.url
+    total = body_length(response)
+    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    received = 0
+    failures = 0
+    try:
+        while True:
+            try:
+                for chunk in response.iter_content(chunk_size):
+                    if should_continue is not None and not should_continue():
+                        raise DownloadCancelled(url)
+                    if chunk:
+                        received += len(chunk)
+                        yield chunk
+                break
+            except RESUMABLE_ERRORS as e:
+                response.close()
+                failures += 1
+                if failures > retries:
+                    raise IncompleteDownload(f"gave up after {received} bytes: {e}") from e
+                headers = {'Range': f'bytes={received}-'}
+                if validator:
+                    headers['If-Range'] = validator
+                response = session.get(url, headers=headers, stream=True, timeout=timeout)
+                if response.status_code == 206 and range_start(response) == received:
+                    continue
+                if response.status_code == 200 and received == 0:
+                    continue
+                raise IncompleteDownload(f"server cannot resume at byte {received} "
+                                         f"(status {response.status_code})") from e
+    finally:
+        response.close()
+
+    if total is not None and received != total:
+        raise IncompleteDownload(f"received {received} of {total} bytes")
+
+
+def save_atomic(chunks, path: str) -> int:
+    """Write chunks to path through a .part file renamed into place only when complete"""
+    temp_path = path + '.part'
+    size = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+def safe_filename(person_name: str) -> str:
+    """Filesystem-safe form of a person's name"""
+    safe_name = re.sub(r'[^\w\s-]', '', person_name)
+    return re.sub(r'[-\s]+', '_', safe_name)
+
+
+def print_log(message, level="info"):
+    """Default log sink for headless runs"""
+    print(f"{time.strftime('%H:%M:%S')} [{level}] {message}", flush=True)
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous (non-event-loop) code"""
+    return asyncio.run(coro)
+
+
+class AsyncTransport:
+    """asyncio front end for a requests.Session
+
+    requests is blocking, so calls are handed to a fixed-size executor; a
+    single event loop can keep many lookups pending while only
+    max_in_flight sockets are actually open.
+    """
+
+    def __init__(self, session: requests.Session, max_in_flight: int = 64):
+        self.session = session
+        self.max_in_flight = max(1, max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                           thread_name_prefix='fetch')
+
+    async def call(self, fn: Callable, *args, **kwargs):
+        """Run blocking network code, such as reading a streamed body, on the executor
+
+        Cancelling the awaiting task also cancels a request still waiting
+        for its rate-limit token, so it is never sent.
+        """
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        job = functools.partial(fn, *args, **kwargs)
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(run_cancellable, cancelled, job))
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Perform a request without blocking the event loop"""
+        return await self.call(self.session.request, method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        return await self.request('GET', url, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class DownloadPool:
+    """Run downloads concurrently under a global and a per-host concurrency cap"""
+
+    def __init__(self, max_workers: int = 8, per_host: int = 2,
+                 host_limits: Optional[Dict[str, int]] = None):
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self._slots = threading.Semaphore(self.max_workers)
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def host_slot(self, url: str) -> threading.Semaphore:
+        """Semaphore limiting concurrent requests to the url's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.Semaphore(max(1, self.host_limits.get(host, self.per_host)))
+                self._host_slots[host] = slot
+            return slot
+
+    def run(self, fn: Callable, items: List, url_of: Callable = lambda item: item['url'],
+            should_continue: Callable = lambda: True) -> List:
+        """Call fn(item) for every item concurrently; results keep the input order
+
+        The worker cap is shared by every concurrent run() on this pool.
+        """
+        def task(item):
+            if not should_continue():
+                return None
+            # Host slot first: threads queued on a busy host must not hold
+            # global slots that downloads from other hosts could use
+            with self.host_slot(url_of(item)), self._slots:
+                if not should_continue():
+                    return None
+                return fn(item)
+
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(task, items))
+
+
+class ScraperEngine:
+    """GUI-free profile image scraper shared by the Tk front ends and the batch CLI"""
+
+    def __init__(self, download_folder: str = "profile_images", max_images: int = 15,
+                 log: Optional[Callable] = None, download_pool: Optional[DownloadPool] = None,
+                 max_in_flight: int = 64, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 256 * 1024 * 1024,
+                 limiter: Optional[HostRateLimiter] = None,
+                 near_dupe_distance: Optional[int] = DEFAULT_MAX_DISTANCE,
+                 metrics: Optional[ScrapeMetrics] = None,
+                 journal: Optional[JobJournal] = None,
+                 thumbnail_size: Optional[int] = None,
+                 normalize: Optional[Dict] = None,
+                 min_image_bytes: int = MIN_IMAGE_BYTES,
+                 max_image_bytes: Optional[int] = DEFAULT_MAX_IMAGE_BYTES,
+                 min_side: int = DEFAULT_MIN_SIDE,
+                 aspect_range: Optional[Tuple[float, float]] = DEFAULT_ASPECT_RANGE,
+                 min_score: Optional[float] = None,
+                 url_index: Optional[SeenUrlIndex] = None,
+                 extra_sources: Tuple[str, ...] = ()):
+        self.download_folder = download_folder
+        self.max_images = max_images
+        self.log = log or print_log
+        self.is_scraping = True
+        self.scraped_urls = set()
+        self.download_pool = download_pool or DownloadPool()
+        self.near_dupe_distance = near_dupe_distance
+        self.min_image_bytes = min_image_bytes
+        self.max_image_bytes = max_image_bytes
+        self.min_side = min_side
+        self.aspect_range = aspect_range
+        self.min_score = min_score
+        self.url_index = url_index
+        self.extra_sources = extra_sources
+        self._store = None
+        self._store_lock = threading.Lock()
+        self.thumbnail_size = thumbnail_size
+        self._thumbs = None
+        self.normalize = normalize
+        self._normalizer = None
+        self.limiter = limiter or HostRateLimiter()
+        self.metrics = metrics or ScrapeMetrics()
+        self.journal = journal
+        self.setup_session(cache_dir, cache_max_bytes)
+        self.transport = AsyncTransport(self.session, max_in_flight)
+
+    def setup_session(self, cache_dir: Optional[str] = None, cache_max_bytes: int = 256 * 1024 * 1024):
+        """Initialize the shared pooled session with an optional HTTP cache"""
+        self.session = build_session(self.limiter, cache_dir, cache_max_bytes)
+        self.http_cache = session_cache(self.session)
+        self.user_agents = USER_AGENTS
+        self.session.hooks['response'].append(self.record_response)
+
+    def record_response(self, response: requests.Response, *args, **kwargs):
+        """Session hook: per-host latency, status and cache-hit metrics"""
+        host = urlparse(response.url).netloc
+        if getattr(response, 'from_cache', False):
+            self.metrics.cache_hits.inc(host=host)
+        else:
+            self.metrics.request_seconds.observe(response.elapsed.total_seconds(), host=host)
+        self.metrics.responses.inc(host=host, status=response.status_code)
+
+    def export_metrics(self, prometheus_path: Optional[str] = None, json_path: Optional[str] = None):
+        """Write this run's metrics as a Prometheus text file and/or a JSON summary"""
+        self.metrics.rate_limit_wait.set(round(self.limiter.waited, 3))
+        for host, stats in connection_stats(self.session).items():
+            self.metrics.connections.set(stats['connections'], host=host)
+            self.metrics.pooled_requests.set(stats['requests'], host=host)
+        if prometheus_path:
+            self.metrics.write_prometheus(prometheus_path)
+        if json_path:
+            self.metrics.write_json(json_path)
+
+    def image_store(self) -> ImageStore:
+        """Content-addressed store for the current download folder"""
+        with self._store_lock:
+            if self._store is None or self._store.root != self.download_folder:
+                self._store = ImageStore(self.download_folder)
+            return self._store
+
+    def thumbnail_stage(self) -> ThumbnailStage:
+        """Preview generator for the current download folder"""
+        with self._store_lock:
+            if self._thumbs is None or self._thumbs.root != self.download_folder:
+                if self._thumbs is not None:
+                    self._thumbs.close()
+                self._thumbs = ThumbnailStage(self.download_folder, self.thumbnail_size or DEFAULT_THUMB_SIZE)
+            return self._thumbs
+
+    def normalizer(self) -> NormalizeStage:
+        """Re-encoder (configured by the normalize options) for the current store"""
+        store = self.image_store()
+        with self._store_lock:
+            if self._normalizer is None or self._normalizer.store is not store:
+                if self._normalizer is not None:
+                    self._normalizer.close()
+                self._normalizer = NormalizeStage(store, **self.normalize)
+            return self._normalizer
+
+    def normalize_images(self, paths: List[str], journal_key: Optional[str] = None) -> List[str]:
+        """Re-encode saved images; returns the paths now holding them"""
+        stage = self.normalizer()
+        paths, replaced = stage.run(paths)
+        for old_path, new_path in replaced.items():
+            self.log_message(f"Normalized {os.path.basename(old_path)} -> {os.path.basename(new_path)}")
+            if journal_key:
+                self.journal.record_download(journal_key, stage.store.entry(new_path)['url'], new_path)
+        return paths
+
+    def make_thumbnails(self, paths: List[str]) -> List[str]:
+        """Thumbnails for saved images, generated once each across runs"""
+        thumbs = [thumb for thumb in self.thumbnail_stage().run(paths) if thumb]
+        if len(thumbs) < len(paths):
+            self.log_message(f"Could not make {len(paths) - len(thumbs)} thumbnails", "warning")
+        return thumbs
+
+    def close(self):
+        """Release the transport threads and the image process pools"""
+        self.transport.close()
+        for stage in (self._thumbs, self._normalizer):
+            if stage is not None:
+                stage.close()
+
+    def log_message(self, message, level="info"):
+        """Forward a message to the configured log sink"""
+        self.log(message, level)
+
+    def stop(self):
+        """Ask the running scrape to stop at the next checkpoint"""
+        self.is_scraping = False
+
+    def scrape_person(self, person: Dict) -> Dict:
+        """Blocking wrapper around scrape_person_async"""
+        return run_sync(self.scrape_person_async(person))
+
+    async def scrape_person_async(self, person: Dict) -> Dict:
+        """Run every source for one person and download up to max_images images"""
+        with self.metrics.person_seconds.time():
+            result = await self._scrape_person(person)
+        self.metrics.people.inc()
+        return result
+
+    async def _scrape_person(self, person: Dict) -> Dict:
+        person_name = person['name'].strip()
+        max_images = int(person.get('max_images') or self.max_images)
+        result = {'name': person_name, 'found': 0, 'downloaded': 0, 'files': [], 'errors': 0}
+
+        # With a journal, finished people are skipped and sources that
+        # already answered are replayed instead of refetched
+        key = JobJournal.person_key(person, PERSON_FIELDS) if self.journal else None
+        answered = {}
+        if key:
+            finished = self.journal.finished(key)
+            if finished:
+                self.log_message(f"Already done: {person_name} ({finished['downloaded']} images)")
+                return finished
+            self.journal.start(key)
+            answered = self.journal.source_candidates(key)
+
+        os.makedirs(self.download_folder, exist_ok=True)
+        # Per-person seen set so several people can be scraped concurrently;
+        # with a URL index it also hides URLs handled in earlier runs, before
+        # they can count towards max_images and stop the search early
+        seen = UnseenSet(self.url_index, safe_filename(person_name)) if self.url_index else set()
+
+        self.log_message(f"Starting hunt for: {person_name}")
+        self.log_message(f"Target: {max_images} images")
+
+        # Every source starts at once; direct profiles are listed first so
+        # they win ties when the candidate pool is cut to max_images
+        sources = []
+
+        def add_source(label, start):
+            if label in answered:
+                replayed = answered[label]
+                if self.url_index:
+                    replayed = [img for img in replayed if img['url'] not in seen]
+                seen.update(img['url'] for img in replayed)
+                sources.append((label, self.replay_source(replayed)))
+            else:
+                sources.append((label, self.journaled_source(key, label, start())))
+
+        platforms = {p: person[p].strip() for p in PLATFORMS if (person.get(p) or '').strip()}
+        for platform, identifier in platforms.items():
+            self.log_message(f"Scanning {platform}: {identifier}")
+            scrape = getattr(self, f'scrape_{platform}_async')
+            add_source(platform, lambda scrape=scrape, identifier=identifier: scrape(identifier, seen))
+
+        search_url = (person.get('search_url') or '').strip()
+        if search_url:
+            self.log_message("Scanning custom search URL...")
+            add_source('custom search', lambda: self.scrape_search_results_async(search_url, seen))
+
+        query_name = ' '.join(filter(None, [person_name, (person.get('company') or '').strip()]))
+        self.log_message("Searching Google Images and DuckDuckGo Images...")
+        add_source('Google Images', lambda: self.search_google_images_async(query_name, max_images, seen))
+        add_source('DuckDuckGo', lambda: self.search_duckduckgo_images_async(query_name, max_images, seen))
+        if 'bing' in self.extra_sources:
+            self.log_message("Searching Bing Images...")
+            add_source('Bing Images', lambda: self.search_bing_images_async(query_name, max_images, seen))
+        for name, (domain, label) in SITE_SEARCHES.items():
+            if name in self.extra_sources:
+                self.log_message(f"Searching {domain}...")
+                add_source(label, lambda name=name: self.search_site_async(name, person_name, seen))
+
+        all_images = await self.gather_candidates(sources, max_images, len(platforms), result)
+        if self.url_index and seen.skipped:
+            self.metrics.seen_skips.inc(len(seen.skipped))
+            self.log_message(f"Skipping {len(seen.skipped)} URLs handled in earlier runs")
+
+        result['found'] = len(all_images)
+        self.scraped_urls.update(seen)
+
+        # Download images
+        loop = asyncio.get_running_loop()
+        result['files'] = await loop.run_in_executor(
+            None, self.download_images, all_images, person_name, max_images, key)
+        result['downloaded'] = len(result['files'])
+        if self.normalize is not None and result['files'] and self.is_scraping:
+            result['files'] = await loop.run_in_executor(None, self.normalize_images, result['files'], key)
+        if self.thumbnail_size and result['files'] and self.is_scraping:
+            result['thumbnails'] = await loop.run_in_executor(None, self.make_thumbnails, result['files'])
+
+        # A person whose sources failed stays unfinished, so a rerun retries just those sources
+        if key and self.is_scraping and not result['errors']:
+            self.journal.finish(key, result)
+        return result
+
+    async def replay_source(self, images: List[Dict]) -> List[Dict]:
+        """Candidates a source returned in an earlier, interrupted run"""
+        return images
+
+    async def journaled_source(self, key: Optional[str], label: str, coro) -> List[Dict]:
+        """Await a source and journal its candidates once it has answered
+
+        Sources raise on timeouts, connection errors and 429/5xx answers, so
+        only real answers are journaled; failed sources run again on resume.
+        """
+        images = await coro
+        if key:
+            self.journal.record_source(key, label, images)
+        return images
+
+    async def gather_candidates(self, sources: List, max_images: int, primary: int,
+                                result: Dict) -> List[Dict]:
+        """Run (label, coroutine) sources concurrently into one ranked candidate pool
+
+        Outstanding sources are cancelled once the pool holds max_images
+        candidates and the first `primary` sources (direct profiles) have
+        all reported, or when scraping is stopped. The pool comes back best
+        first (see ranking.rank_candidates), without those under min_score.
+        """
+        started = time.perf_counter()
+        tasks = {asyncio.ensure_future(coro): (rank, label) for rank, (label, coro) in enumerate(sources)}
+        pending = set(tasks)
+        primary_left = primary
+        pool = []
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                rank, label = tasks[task]
+                if rank < primary:
+                    primary_left -= 1
+                self.metrics.source_seconds.observe(time.perf_counter() - started, source=label)
+                try:
+                    images = task.result()
+                except Exception as e:
+                    result['errors'] += 1
+                    self.metrics.source_errors.inc(source=label)
+                    self.log_message(f"{label} error: {str(e)}", "error")
+                    continue
+                # Zero counts too, so sources that never yield anything show up
+                self.metrics.candidates.inc(len(images or ()), source=label)
+                if images:
+                    pool.extend((rank, i, img) for i, img in enumerate(images))
+                    self.log_message(f"Found {len(images)} from {label}")
+
+            enough = len(pool) >= max_images and primary_left == 0
+            if pending and (enough or not self.is_scraping):
+                if enough:
+                    self.log_message(f"Have {len(pool)} candidates, cancelling "
+                                     f"{', '.join(tasks[t][1] for t in pending)}")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+        # Discovery order breaks ties in the ranking, direct profiles first
+        pool.sort(key=lambda entry: entry[:2])
+        ranked = rank_candidates([img for _, _, img in pool], self.min_score)
+        if ranked:
+            self.log_message(f"Ranked {len(ranked)} candidates, best {ranked[0]['score']} "
+                             f"from {ranked[0]['source']}")
+        return ranked
+
+    def download_images(self, images: List[Dict], person_name: str,
+                        max_images: Optional[int] = None, journal_key: Optional[str] = None) -> List[str]:
+        """Download candidates in order until max_images distinct images are saved
+
+        Downloads run through the pool in waves; slots lost to failures,
+        tiny files or near-duplicates are refilled from later candidates.
+        With a journal_key, images saved by an earlier run count towards max_images.
+        """
+        max_images = len(images) if max_images is None else max_images
+        saved = []
+        if journal_key:
+            done = self.journal.downloads(journal_key)
+            for path in done.values():
+                if os.path.lexists(path) and path not in saved:
+                    saved.append(path)
+            if saved:
+                self.log_message(f"Resuming {person_name}: {len(saved)} images already saved")
+            images = [img for img in images if img['url'] not in done]
+        # Candidates from scrape_person are already filtered; lists from other callers are not
+        if self.url_index:
+            person = safe_filename(person_name)
+            fresh = [img for img in images if not self.url_index.seen(person, img['url'])]
+            if len(fresh) < len(images):
+                self.metrics.seen_skips.inc(len(images) - len(fresh))
+                self.log_message(f"Skipping {len(images) - len(fresh)} URLs handled in earlier runs")
+            images = fresh
+
+        near_dupes = None
+        if self.near_dupe_distance is not None and self.near_dupe_distance >= 0:
+            known = self.image_store().person_hashes(safe_filename(person_name))
+            near_dupes = NearDuplicateIndex(known, self.near_dupe_distance)
+
+        def fetch(img):
+            path = self.download_image(img, person_name, near_dupes)
+            if path and journal_key:
+                self.journal.record_download(journal_key, img['url'], path)
+            return path
+
+        self.log_message(f"Downloading up to {max_images} images "
+                         f"({self.download_pool.max_workers} parallel)")
+        queue = list(images)
+        while queue and len(saved) < max_images and self.is_scraping:
+            wave, queue = queue[:max_images - len(saved)], queue[max_images - len(saved):]
+            paths = self.download_pool.run(fetch, wave, should_continue=lambda: self.is_scraping)
+            for path in paths:
+                if path and path not in saved:
+                    saved.append(path)
+        return saved[:max_images]
+
+    def collect_images(self, content, platform: str, source: str, seen: set,
+                       base_url: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Candidates from a page under PLATFORM_RULES[platform], skipping URLs in seen"""
+        return self.to_candidates(extract_image_urls(content, platform, base_url),
+                                  platform, source, seen, limit)
+
+    def to_candidates(self, found: List, platform: str, source: str, seen: set,
+                      limit: Optional[int] = None) -> List[Dict]:
+        """Candidate dicts for (url, rule) pairs not already in seen"""
+        images = []
+        for img_url, rule in found:
+            if limit is not None and len(images) >= limit:
+                break
+            if img_url not in seen:
+                seen.add(img_url)
+                images.append({
+                    'url': img_url,
+                    'source': source,
+                    'platform': platform,
+                    'rule': rule
+                })
+        return images
+
+    def read_profile_page(self, url: str, platform: str, base_url: Optional[str] = None,
+                          **kwargs) -> Tuple[int, List]:
+        """(status, (url, rule) pairs) for a profile page, reading only its head when possible
+
+        The body is streamed and the connection dropped as soon as an
+        og:image style meta matches; pages without one are read in full, as
+        are pages the HTTP cache will store.
+        """
+        with self.session.get(url, stream=True, **kwargs) as response:
+            if response.status_code != 200:
+                return response.status_code, []
+            chunks = response.iter_content(STREAM_CHUNK)
+            found = extract_head_image_urls(chunks, platform, base_url)
+            finish_for_cache(response, chunks)
+            return 200, found
+
+    async def scrape_linkedin_async(self, profile_url, seen=None):
+        """Enhanced LinkedIn scraping"""
+        seen = self.scraped_urls if seen is None else seen
+        if not profile_url.startswith('http'):
+            profile_url = f"https://linkedin.com/in/{profile_url}"
+
+        status, found = await self.transport.call(self.read_profile_page, profile_url, 'linkedin',
+                                                  timeout=15)
+        check_source_status(status, profile_url)
+        if status == 200:
+            return self.to_candidates(found, 'linkedin', 'LinkedIn', seen)
+        return []
+
+    def scrape_linkedin(self, profile_url):
+        """Blocking wrapper around scrape_linkedin_async"""
+        return self.run_source("LinkedIn", self.scrape_linkedin_async(profile_url))
+
+    async def scrape_twitter_async(self, identifier, seen=None):
+        """Enhanced Twitter scraping"""
+        seen = self.scraped_urls if seen is None else seen
+        username = identifier.replace('@', '').split('/')[-1]
+
+        # Either domain answering counts; the source fails only if neither could
+        failure = None
+        for domain in ['x.com', 'twitter.com']:
+            url = f"https://{domain}/{username}"
+            try:
+                status, found = await self.transport.call(self.read_profile_page, url, 'twitter', timeout=15)
+                check_source_status(status, url)
+            except Exception as e:
+                failure = e
+                continue
+            if status == 200:
+                return self.to_candidates(found, 'twitter', f'Twitter-{username}', seen)
+            failure = None
+        if failure is not None:
+            raise failure
+        return []
+
+    def scrape_twitter(self, identifier):
+        """Blocking wrapper around scrape_twitter_async"""
+        return self.run_source("Twitter", self.scrape_twitter_async(identifier))
+
+    async def scrape_github_async(self, identifier, seen=None):
+        """Enhanced GitHub scraping"""
+        seen = self.scraped_urls if seen is None else seen
+        images = []
+        username = identifier.split('/')[-1]
+
+        # Try API first
+        api_url = f"https://api.github.com/users/{username}"
+        response = await self.transport.get(api_url, timeout=10)
+        check_source_status(response.status_code, api_url)
+
+        if response.status_code == 200:
+            data = response.json()
+            avatar_url = data.get('avatar_url')
+            if avatar_url and avatar_url + '?s=400' not in seen:
+                seen.add(avatar_url + '?s=400')
+                images.append({
+                    'url': avatar_url + '?s=400',
+                    'source': f'GitHub-{username}',
+                    'platform': 'github'
+                })
+
+        return images
+
+    def scrape_github(self, identifier):
+        """Blocking wrapper around scrape_github_async"""
+        return self.run_source("GitHub", self.scrape_github_async(identifier))
+
+    async def scrape_website_async(self, url, seen=None):
+        """Enhanced website scraping"""
+        seen = self.scraped_urls if seen is None else seen
+        if not url.startswith('http'):
+            url = 'https://' + url
+
+        status, found = await self.transport.call(self.read_profile_page, url, 'website',
+                                                  base_url=url, timeout=15)
+        check_source_status(status, url)
+
+        if status == 200:
+            return self.to_candidates(found, 'website', f'Website-{urlparse(url).netloc}', seen)
+        return []
+
+    def scrape_website(self, url):
+        """Blocking wrapper around scrape_website_async"""
+        return self.run_source("Website", self.scrape_website_async(url))
+
+    async def scrape_search_results_async(self, search_url, seen=None):
+        """Scrape images from search results page"""
+        seen = self.scraped_urls if seen is None else seen
+        response = await self.transport.get(search_url, timeout=15)
+        check_source_status(response.status_code, search_url)
+
+        if response.status_code == 200:
+            return self.collect_images(response.content, 'search', 'Search Results', seen,
+                                       base_url=search_url)
+        return []
+
+    def scrape_search_results(self, search_url):
+        """Blocking wrapper around scrape_search_results_async"""
+        return self.run_source("Search results", self.scrape_search_results_async(search_url))
+
+    async def search_google_images_async(self, person_name, max_results, seen=None):
+        """Search Google Images"""
+        seen = self.scraped_urls if seen is None else seen
+        images = []
+        query = f"{person_name} profile picture"
+        search_url = f"https://www.google.com/search?q={quote(query)}&tbm=isch"
+
+        response = await self.transport.get(search_url, timeout=15)
+        check_source_status(response.status_code, search_url)
+
+        if response.status_code == 200:
+            # Extract image URLs from Google Images in one pass over the raw bytes
+            for img_url, kind in extract_search_urls(response.content, 'google', max_results, seen):
+                images.append({
+                    'url': img_url,
+                    'source': 'Google Images',
+                    'platform': 'google',
+                    'rule': kind
+                })
+
+        return images
+
+    def search_google_images(self, person_name, max_results):
+        """Blocking wrapper around search_google_images_async"""
+        return self.run_source("Google Images", self.search_google_images_async(person_name, max_results))
+
+    async def search_duckduckgo_images_async(self, person_name, max_results, seen=None):
+        """Search DuckDuckGo Images"""
+        seen = self.scraped_urls if seen is None else seen
+        query = f"{person_name} profile picture"
+        search_url = f"https://duckduckgo.com/?q={quote(query)}&t=h_&iax=images&ia=images"
+
+        response = await self.transport.get(search_url, timeout=15)
+        check_source_status(response.status_code, search_url)
+
+        if response.status_code == 200:
+            return self.collect_images(response.content, 'duckduckgo', 'DuckDuckGo Images', seen,
+                                       limit=max_results)
+        return []
+
+    def search_duckduckgo_images(self, person_name, max_results):
+        """Blocking wrapper around search_duckduckgo_images_async"""
+        return self.run_source("DuckDuckGo Images",
+                               self.search_duckduckgo_images_async(person_name, max_results))
+
+    async def search_bing_images_async(self, person_name, max_results, seen=None):
+        """Search Bing Images"""
+        seen = self.scraped_urls if seen is None else seen
+        query = f"{person_name} profile picture"
+        search_url = f"https://www.bing.com/images/search?q={quote(query)}"
+
+        response = await self.transport.get(search_url, timeout=15)
+        check_source_status(response.status_code, search_url)
+
+        if response.status_code == 200:
+            found = extract_search_urls(response.content, 'bing', max_results, seen)
+            return [{'url': img_url, 'source': 'Bing Images', 'platform': 'bing', 'rule': kind}
+                    for img_url, kind in found]
+        return []
+
+    def search_bing_images(self, person_name, max_results):
+        """Blocking wrapper around search_bing_images_async"""
+        return self.run_source("Bing Images", self.search_bing_images_async(person_name, max_results))
+
+    async def search_site_async(self, name, person_name, seen=None):
+        """Picture from the first of a site's pages (per a Google site: search) that has one"""
+        seen = self.scraped_urls if seen is None else seen
+        domain, label = SITE_SEARCHES[name]
+        search_url = f"https://www.google.com/search?q={quote(f'site:{domain} {person_name}')}"
+
+        response = await self.transport.get(search_url, timeout=15)
+        check_source_status(response.status_code, search_url)
+        if response.status_code != 200:
+            return []
+
+        # A result page that fails to load is skipped; the search itself answered
+        for link in extract_result_links(response.content, domain, SITE_SEARCH_PAGES):
+            try:
+                status, found = await self.transport.call(self.read_profile_page, link, 'website',
+                                                          base_url=link, timeout=15)
+            except requests.RequestException:
+                continue
+            images = self.to_candidates(found, name, label, seen, limit=1) if status == 200 else []
+            if images:
+                return images
+        return []
+
+    def search_site(self, name, person_name):
+        """Blocking wrapper around search_site_async"""
+        return self.run_source(SITE_SEARCHES[name][1], self.search_site_async(name, person_name))
+
+    def run_source(self, label: str, coro) -> List[Dict]:
+        """Run a source coroutine to completion; errors are logged and yield no candidates"""
+        try:
+            return run_sync(coro)
+        except Exception as e:
+            self.log_message(f"{label} error: {str(e)}", "error")
+            return []
+
+    def remember_url(self, person: str, url: str, junk: bool = False):
+        """Note a handled URL in the persistent index so later runs skip it"""
+        if self.url_index:
+            self.url_index.record(person, url, junk)
+
+    def download_image(self, img_info, person_name,
+                       near_dupes: Optional[NearDuplicateIndex] = None) -> Optional[str]:
+        """Download individual image, returning the saved path or None"""
+        started = time.perf_counter()
+        try:
+            img_url = img_info['url']
+            source = img_info['source']
+            platform = img_info.get('platform', 'unknown')
+
+            # Create safe filename
+            safe_name = safe_filename(person_name)
+
+            # Single streaming GET; the first bytes decide format and extension
+            response = self.session.get(img_url, timeout=20, stream=True)
+            response.raise_for_status()
+
+            chunks = resumable_chunks(self.session, response, timeout=20,
+                                      should_continue=lambda: self.is_scraping)
+            # Byte and pixel limits apply from the headers and first bytes, before any file exists
+            ext, head, chunks, dimensions = read_checked_head(
+                response, chunks, self.min_image_bytes, self.max_image_bytes, self.min_side, self.aspect_range)
+            if not ext:
+                chunks.close()
+                self.remember_url(safe_name, img_url, junk=True)
+                self.metrics.rejects.inc(reason='not_image')
+                self.log_message(f"Skipped non-image: {source}", "warning")
+                return None
+
+            # Hash while writing into the content-addressed store
+            store = self.image_store()
+            temp_path, digest, size = store.write_temp(itertools.chain([head], chunks))
+            self.metrics.download_bytes.inc(size, platform=platform)
+
+            object_path, is_new = store.commit(temp_path, digest, ext)
+            existing = store.find_link(safe_name, digest)
+            if existing:
+                self.remember_url(safe_name, img_url)
+                self.metrics.downloads.inc(platform=platform)
+                self.log_message(f"Already have {os.path.basename(existing)} from {source}")
+                return existing
+
+            # Perceptual hash catches the same photo at another size or encoding
+            entry = {'person': safe_name, 'sha256': digest, 'size': size,
+                     'url': img_url, 'source': source, 'platform': platform}
+            if dimensions:
+                entry['width'], entry['height'] = dimensions
+            if near_dupes is not None:
+                try:
+                    image_hash = dhash(object_path)
+                except Exception:
+                    image_hash = None  # format Pillow cannot decode; keep it
+                if image_hash is not None:
+                    if near_dupes.check_and_add(image_hash) is not None:
+                        if is_new:
+                            store.discard(object_path)
+                        self.remember_url(safe_name, img_url)
+                        self.metrics.rejects.inc(reason='near_duplicate')
+                        self.log_message(f"Skipped near-duplicate from {source}", "warning")
+                        return None
+                    entry['dhash'] = f"{image_hash:016x}"
+
+            filename = f"{safe_name}_{platform}_{digest[:12]}{ext}"
+            filepath = os.path.join(self.download_folder, filename)
+            store.link(object_path, filepath)
+            store.record(dict(entry, file=filename))
+            self.remember_url(safe_name, img_url)
+            self.metrics.downloads.inc(platform=platform)
+
+            if is_new:
+                self.log_message(f"✅ Downloaded: {filename} from {source}")
+            else:
+                self.log_message(f"✅ Linked: {filename} from {source} (already stored)")
+            return filepath
+
+        except DownloadCancelled:
+            return None
+        except ImageRejected as e:
+            # Byte and pixel limits are settings (--max-image-mb, --min-side, --aspect-range),
+            # and the index cannot forget, so these stay retryable under other settings
+            self.metrics.rejects.inc(reason=e.reason)
+            self.log_message(f"Skipped image from {img_info['source']}: {e}", "warning")
+            return None
+        except requests.exceptions.RequestException as e:
+            self.metrics.rejects.inc(reason='http_error')
+            self.log_message(f"Download failed from {img_info['source']}: {str(e)}", "error")
+            return None
+        except Exception as e:
+            self.metrics.rejects.inc(reason='error')
+            self.log_message(f"Unexpected error downloading from {img_info['source']}: {str(e)}", "error")
+            return None
+        finally:
+            self.metrics.download_seconds.observe(time.perf_counter() - started,
+                                                  platform=img_info.get('platform', 'unknown'))
+
+
+def load_people(path: str) -> List[Dict]:
+    """Load a person list from a .csv (header row) or .jsonl file
+
+    Raises ValueError when no row has a name.
+    """
+    people = []
+    # utf-8-sig drops the byte order mark Excel puts before the header row
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    people.append(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_no}: invalid JSON ({e})")
+        else:
+            people.extend(csv.DictReader(f))
+
+    # Normalize keys and drop rows without a name
+    normalized = []
+    for row in people:
+        person = {str(k).strip().lower(): (v or '').strip() if isinstance(v, str) else v
+                  for k, v in row.items() if k}
+        if person.get('name'):
+            normalized.append(person)
+    if not normalized:
+        raise ValueError(f"{path}: no rows with a name (expected a 'name' column or key)")
+    return normalized
+
+
+def run_batch(engine: ScraperEngine, people: List[Dict], concurrency: int = 1) -> Dict:
+    """Blocking wrapper around run_batch_async"""
+    return run_sync(run_batch_async(engine, people, concurrency))
+
+
+async def run_batch_async(engine: ScraperEngine, people: List[Dict], concurrency: int = 1) -> Dict:
+    """Scrape people with up to `concurrency` in flight and return a throughput summary"""
+    started = time.time()
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def scrape_one(i, person):
+        async with slots:
+            if not engine.is_scraping:
+                return None
+            engine.log_message(f"[{i}/{len(people)}] {person['name']}")
+            person_started = time.time()
+            try:
+                result = await engine.scrape_person_async(person)
+            except Exception as e:
+                engine.log_message(f"Hunt error for {person['name']}: {str(e)}", "error")
+                result = {'name': person['name'], 'found': 0, 'downloaded': 0, 'files': [], 'errors': 1}
+            result['seconds'] = round(time.time() - person_started, 3)
+            # scraped_urls only serves the GUI's export; in a batch it would grow with every person
+            engine.scraped_urls.clear()
+            return result
+
+    outcomes = await asyncio.gather(*(scrape_one(i, person) for i, person in enumerate(people, 1)))
+    results = [r for r in outcomes if r is not None]
+
+    elapsed = time.time() - started
+    downloaded = sum(r['downloaded'] for r in results)
+    return {
+        'people': len(results),
+        'people_total': len(people),
+        'candidates_found': sum(r['found'] for r in results),
+        'images_downloaded': downloaded,
+        'people_without_images': sum(1 for r in results if not r['downloaded']),
+        'errors': sum(r['errors'] for r in results),
+        'elapsed_seconds': round(elapsed, 3),
+        'people_per_minute': round(len(results) / elapsed * 60, 2) if elapsed else 0.0,
+        'images_per_second': round(downloaded / elapsed, 3) if elapsed else 0.0,
+        'results': results,
+    }
+
+
+def parse_aspect_range(spec: str) -> Tuple[float, float]:
+    """'0.4:1.5' -> (0.4, 1.5)"""
+    low, sep, high = spec.partition(':')
+    try:
+        if not sep:
+            raise ValueError
+        aspect_range = (float(low), float(high))
+    except ValueError:
+        raise ValueError(f"expected MIN:MAX width/height ratios, got {spec!r}") from None
+    if not 0 < aspect_range[0] <= aspect_range[1]:
+        raise ValueError(f"aspect range must satisfy 0 < MIN <= MAX, got {spec!r}")
+    return aspect_range
+
+
+def format_summary(summary: Dict) -> str:
+    """Human readable throughput summary"""
+    return "\n".join([
+        "Batch summary",
+        f"  People processed : {summary['people']}/{summary['people_total']}",
+        f"  Candidates found : {summary['candidates_found']}",
+        f"  Images saved     : {summary['images_downloaded']}",
+        f"  No images        : {summary['people_without_images']}",
+        f"  Source errors    : {summary['errors']}",
+        f"  Elapsed          : {summary['elapsed_seconds']:.1f}s",
+        f"  Throughput       : {summary['people_per_minute']} people/min, "
+        f"{summary['images_per_second']} images/s",
+    ])
+
+
+def format_sources(metrics: ScrapeMetrics) -> str:
+    """One line per source: candidates found and mean time to answer"""
+    candidates = metrics.candidates.summary()
+    lines = ["  Sources:"]
+    for label, timing in metrics.source_seconds.summary().items():
+        found = candidates.get(label, 0)
+        lines.append(f"    {label.split('=', 1)[1]:<16} {int(found):5d} candidates  "
+                     f"{timing['mean']:.2f}s avg  {timing['count']} calls")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Headless batch entry point"""
+    parser = argparse.ArgumentParser(description="Collect profile images for a list of people")
+    parser.add_argument('people', help="CSV or JSONL file with columns: " + ", ".join(PERSON_FIELDS))
+    parser.add_argument('-o', '--output', default="profile_images", help="download folder")
+    parser.add_argument('-n', '--max-images', type=int, default=15, help="max images per person")
+    parser.add_argument('-p', '--parallel-people', type=int, default=8,
+                        help="people scraped concurrently")
+    parser.add_argument('--max-in-flight', type=int, default=64,
+                        help="maximum concurrent page/API requests")
+    parser.add_argument('-j', '--download-workers', type=int, default=8,
+                        help="concurrent downloads across all hosts")
+    parser.add_argument('--per-host', type=int, default=2,
+                        help="concurrent downloads per image host without an explicit limit")
+    parser.add_argument('--cache-dir', default=".http_cache",
+                        help="persistent HTTP cache for profile pages and APIs ('' disables)")
+    parser.add_argument('--cache-size-mb', type=int, default=256, help="HTTP cache size limit")
+    parser.add_argument('--rate', action='append', default=[], metavar="HOST=RATE[:BURST]",
+                        help="requests per second for a host (repeatable), e.g. google.com=0.5:1")
+    parser.add_argument('--near-dupe-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="max dHash Hamming distance treated as the same photo (-1 disables)")
+    parser.add_argument('--summary-json', help="write the batch summary to this JSON file")
+    parser.add_argument('--journal', metavar="FILE",
+                        help="SQLite progress journal; re-running with the same file resumes the batch")
+    parser.add_argument('--metrics-prom', help="write per-stage metrics to this Prometheus text file")
+    parser.add_argument('--metrics-json', help="write per-stage metrics to this JSON file")
+    parser.add_argument('--max-image-mb', type=float, default=DEFAULT_MAX_IMAGE_BYTES / (1024 * 1024),
+                        help="abort downloads larger than this (0 for no limit)")
+    parser.add_argument('--min-side', type=int, default=DEFAULT_MIN_SIDE,
+                        help="skip images whose shorter side is below this many pixels")
+    parser.add_argument('--aspect-range', default="%g:%g" % DEFAULT_ASPECT_RANGE, metavar="MIN:MAX",
+                        help="accepted width/height ratios ('any' to accept every shape)")
+    parser.add_argument('--min-score', type=float,
+                        help="skip candidates ranked below this score (direct profiles score about 2-5)")
+    parser.add_argument('--seen-index', metavar="FILE",
+                        help="persistent index of image URLs already handled; later runs skip them")
+    parser.add_argument('--seen-capacity', type=int, default=DEFAULT_CAPACITY,
+                        help="URLs the seen index is sized for when first created (about 1.2 MB per million)")
+    parser.add_argument('--thumbnail-size', type=int, default=DEFAULT_THUMB_SIZE,
+                        help="longest side of the preview thumbnails in <output>/.thumbs (0 disables)")
+    parser.add_argument('--normalize', nargs='?', const='auto', choices=('auto', 'webp', 'avif'),
+                        help="re-encode saved images to WebP or AVIF (auto: AVIF when supported)")
+    parser.add_argument('--max-side', type=int, default=DEFAULT_MAX_SIDE,
+                        help="longest side of normalized images in pixels")
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY, help="normalized image quality (1-100)")
+    parser.add_argument('--keep-original', action='store_true',
+                        help="keep the downloaded file next to its normalized copy")
+    parser.add_argument('--extra-source', action='append', default=[], choices=EXTRA_SOURCES,
+                        help="also search this source (repeatable): Bing Images, or Medium/Substack pages")
+    parser.add_argument('-q', '--quiet', action='store_true', help="only print the summary")
+    args = parser.parse_args(argv)
+
+    try:
+        people = load_people(args.people)
+        rates = dict(DEFAULT_RATES, **dict(parse_rate(spec) for spec in args.rate))
+        aspect_range = None if args.aspect_range == 'any' else parse_aspect_range(args.aspect_range)
+        normalize = None
+        if args.normalize:
+            normalize = {'fmt': resolve_format(args.normalize), 'max_side': args.max_side,
+                         'quality': args.quality, 'keep_original': args.keep_original}
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    log = (lambda message, level="info": None) if args.quiet else print_log
+    pool = DownloadPool(args.download_workers, args.per_host)
+    engine = ScraperEngine(args.output, args.max_images, log=log, download_pool=pool,
+                           max_in_flight=args.max_in_flight, cache_dir=args.cache_dir or None,
+                           cache_max_bytes=args.cache_size_mb * 1024 * 1024,
+                           limiter=HostRateLimiter(rates),
+                           near_dupe_distance=args.near_dupe_distance,
+                           journal=JobJournal(args.journal) if args.journal else None,
+                           thumbnail_size=args.thumbnail_size or None, normalize=normalize,
+                           max_image_bytes=int(args.max_image_mb * 1024 * 1024) or None,
+                           min_side=args.min_side, aspect_range=aspect_range, min_score=args.min_score,
+                           url_index=SeenUrlIndex(args.seen_index, args.seen_capacity) if args.seen_index else None,
+                           extra_sources=tuple(args.extra_source))
+
+    try:
+        summary = run_batch(engine, people, args.parallel_people)
+    except KeyboardInterrupt:
+        engine.stop()
+        print("Interrupted", file=sys.stderr)
+        return 130
+    finally:
+        engine.export_metrics(args.metrics_prom, args.metrics_json)
+        if engine.journal:
+            engine.journal.close()
+        if engine.url_index:
+            engine.url_index.close()
+        engine.close()
+
+    print(format_summary(summary))
+    print(format_sources(engine.metrics))
+    print("  Connections      : " + format_connection_stats(connection_stats(engine.session)))
+    if engine.http_cache:
+        print("  HTTP cache       : " + ", ".join(f"{k} {v}" for k, v in engine.http_cache.stats.items()))
+    if args.summary_json:
+        with open(args.summary_json, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import pytest
+
+from extract_rules import (PLATFORM_RULES, CompiledRules, extract_head_image_urls, extract_image_urls,
+                           extract_result_links, extract_search_urls)
+from html_parse import iter_events, parse_html, read_head_meta, split_chunks
+
+PAGE = """<!DOCTYPE html>
+<html><head>
+<meta property="og:title" content="Ann Lee" id="m1">
+<meta property="og:image" content="https://media.licdn.com/dms/og.jpg" id="m2">
+</head><body>
+<div class="profile card" id="d1">
+  <img src="https://cdn.example.com/profile/a.jpg" alt="Profile photo" id="i1">
+  <section><img src="/images/nested.png" class="Avatar-Large" id="i2"></section>
+</div>
+<img data-delayed-url="https://media.licdn.com/profile-displayphoto-shrink_800_800/x.jpg" id="i3">
+<div class="pv-top-card__photo"><span><img src="https://media.licdn.com/top.jpg" id="i4"></span></div>
+<img src="https://pbs.twimg.com/profile_images/1/ann_normal.jpg" id="i5">
+<img src="data:image/gif;base64,R0lGOD" class="avatar" id="i6">
+<div class="avatar"><p><a href="#"><img src="avatar-in-div.jpg" id="i7"></a></p></div>
+<img alt="PROFILE picture" src="upper.jpg" id="i8">
+<div class="profiles"><img src="not-profile-class.jpg" id="i9"></div>
+<img class="profile-pic small" src="https://x.example.com/p.jpg" id="i10">
+<picture><source srcset="s.webp"><img src="https://img.example.com/pic.jpg" id="i11"></picture>
+</body></html>"""
+
+EXTRA_SELECTORS = [
+    'img[src^="https://"]',
+    'img[src$=".jpg"]',
+    'img[id="i4"]',
+    'div.avatar img',
+    'span img',
+    'img.profile-pic',
+    'img.small.profile-pic',
+    'div img[src*="media.licdn.com"]',
+]
+
+
+def select_ids(page, selector):
+    soup = parse_html(page, only=None)
+    return [el.get('id') for el in soup.select(selector)]
+
+
+def match_ids(page, selector):
+    (matches,) = CompiledRules([selector]).match(iter_events(split_chunks(page)))
+    return [attrs.get('id') for attrs in matches]
+
+
+ALL_SELECTORS = sorted({s for rules in PLATFORM_RULES.values() for s in rules['selectors']}) + EXTRA_SELECTORS
+
+
+@pytest.mark.parametrize('selector', ALL_SELECTORS)
+def test_matcher_returns_same_elements_as_soup_select(selector):
+    assert match_ids(PAGE, selector) == select_ids(PAGE, selector)
+
+
+def test_selectors_are_matched_in_one_pass():
+    selectors = PLATFORM_RULES['website']['selectors']
+    results = CompiledRules(selectors).match(iter_events(split_chunks(PAGE, size=64)))
+    assert [[attrs.get('id') for attrs in matches] for matches in results] == \
+        [select_ids(PAGE, selector) for selector in selectors]
+
+
+def test_unsupported_selectors_are_rejected():
+    with pytest.raises(ValueError):
+        CompiledRules(['div p img'])
+    with pytest.raises(ValueError):
+        CompiledRules(['img:first-child'])
+
+
+def test_head_read_stops_at_the_first_meta_match():
+    chunks = split_chunks(PAGE, size=32)
+    assert extract_head_image_urls(chunks, 'linkedin') == [
+        ('https://media.licdn.com/dms/og.jpg', 'meta[property="og:image"]')]
+    assert next(chunks, None) is not None  # the body was never read
+
+
+@pytest.mark.parametrize('platform', sorted(PLATFORM_RULES))
+def test_head_read_falls_back_to_the_full_rules(platform):
+    page = PAGE.replace('property="og:image"', 'property="og:image:alt"')
+    base = 'https://ann.example.org/about'
+    streamed = extract_head_image_urls(split_chunks(page, size=32), platform, base)
+    assert streamed == extract_image_urls(page, platform, base)
+
+
+@pytest.mark.parametrize('page', ['', '   ', '<!-- nothing -->'])
+def test_empty_pages_have_no_images(page):
+    assert extract_image_urls(page, 'linkedin') == []
+    assert extract_head_image_urls(split_chunks(page), 'website') == []
+    assert read_head_meta(split_chunks(page))[0] is None
+
+
+def test_bing_urls_come_from_the_m_attribute():
+    page = ('<a class="iusc" m="{&quot;cid&quot;:&quot;1&quot;,&quot;murl&quot;:'
+            '&quot;https://a.example.com/x.jpg?w=1&amp;h=2&quot;}">r</a>'
+            '''<a class="iusc" m='{"murl": "https://b.example.com/y.png", "t": "r"}'>r</a>''')
+    assert [url for url, _ in extract_search_urls(page, 'bing', 10)] == [
+        'https://a.example.com/x.jpg?w=1&h=2', 'https://b.example.com/y.png']
+
+
+def test_result_links_are_unwrapped_and_kept_to_the_domain():
+    page = ('<a href="/url?q=https://medium.com/@ann&amp;sa=U">1</a>'
+            '<a href="https://ann.substack.com/about">2</a>'
+            '<a href="https://notmedium.com/@ann">3</a>'
+            '<a href="https://medium.com/@ann">again</a>'
+            '<a href="https://medium.com/p/post">4</a>')
+    assert extract_result_links(page, 'medium.com', 3) == ['https://medium.com/@ann', 'https://medium.com/p/post']
+    assert extract_result_links(page, 'medium.com', 1) == ['https://medium.com/@ann']
+    assert extract_result_links(page, 'substack.com', 3) == ['https://ann.substack.com/about']
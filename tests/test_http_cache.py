@@ -0,0 +1,201 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_cache import HTTPCache, finish_for_cache, is_cacheable, is_fresh, mount_cache
+
+PAGE = b'<html><body>' + b'x' * 8192 + b'</body></html>'
+
+
+class Origin:
+    """What the test server sends for each path: body, content type and caching headers"""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []   # (path, If-None-Match) per request
+
+    def add(self, path, body=PAGE, content_type='text/html', **headers):
+        self.pages[path] = (body, content_type, headers)
+        return self.url + path
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        origin = self.server.origin
+        origin.requests.append((self.path, self.headers.get('If-None-Match')))
+        body, content_type, headers = origin.pages[self.path]
+        etag = headers.get('ETag')
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace('_', '-'), value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+@pytest.fixture
+def origin():
+    server = QuietServer(('127.0.0.1', 0), Handler)
+    server.origin = Origin()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    server.origin.url = f"http://127.0.0.1:{server.server_port}"
+    yield server.origin
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session(tmp_path):
+    session = requests.Session()
+    session.cache = mount_cache(session, str(tmp_path / 'cache'))
+    yield session
+    session.close()
+
+
+def hits(origin, path):
+    return sum(1 for requested, _ in origin.requests if requested == path)
+
+
+def entry(headers, age):
+    return {'headers': headers, 'stored_at': 1000.0 - age}
+
+
+def test_fresh_by_max_age():
+    assert is_fresh(entry({'Cache-Control': 'max-age=60'}, 30), now=1000.0)
+    assert not is_fresh(entry({'Cache-Control': 'max-age=60'}, 90), now=1000.0)
+
+
+def test_no_cache_is_never_fresh():
+    assert not is_fresh(entry({'Cache-Control': 'no-cache, max-age=60'}, 1), now=1000.0)
+
+
+def test_fresh_by_expires_relative_to_date():
+    headers = {'Date': 'Thu, 01 Jan 2026 00:00:00 GMT', 'Expires': 'Thu, 01 Jan 2026 00:01:00 GMT'}
+    assert is_fresh(entry(headers, 30), now=1000.0)
+    assert not is_fresh(entry(headers, 90), now=1000.0)
+
+
+def test_validator_only_entry_is_stale():
+    assert not is_fresh(entry({'ETag': '"v1"'}, 1), now=1000.0)
+
+
+@pytest.mark.parametrize('status, headers, expected', [
+    (200, {'Cache-Control': 'max-age=60'}, True),
+    (200, {'ETag': '"v1"'}, True),
+    (200, {'Last-Modified': 'Thu, 01 Jan 2026 00:00:00 GMT'}, True),
+    (200, {'ETag': '"v1"', 'Cache-Control': 'no-store'}, False),
+    (200, {}, False),
+    (404, {'Cache-Control': 'max-age=60'}, False),
+])
+def test_is_cacheable(status, headers, expected):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    assert is_cacheable(response) is expected
+
+
+def test_fresh_page_served_from_cache(origin, session):
+    url = origin.add('/fresh', Cache_Control='max-age=60')
+    first = session.get(url, timeout=5)
+    second = session.get(url, timeout=5)
+    assert second.content == first.content == PAGE
+    assert getattr(second, 'from_cache', False)
+    assert hits(origin, '/fresh') == 1
+    assert session.cache.stats['hits'] == 1 and session.cache.stats['misses'] == 1
+
+
+def test_no_store_page_not_cached(origin, session):
+    url = origin.add('/private', Cache_Control='no-store')
+    session.get(url, timeout=5)
+    session.get(url, timeout=5)
+    assert hits(origin, '/private') == 2
+    assert session.cache.stats['stores'] == 0
+
+
+def test_stale_page_revalidated_with_etag(origin, session):
+    url = origin.add('/etag', ETag='"v1"')
+    session.get(url, timeout=5)
+    again = session.get(url, timeout=5)
+    assert again.status_code == 200 and again.content == PAGE
+    assert origin.requests[-1] == ('/etag', '"v1"')
+    assert session.cache.stats['revalidated'] == 1
+
+
+def test_streamed_page_stored_once_read_to_the_end(origin, session):
+    url = origin.add('/profile', Cache_Control='max-age=60')
+    response = session.get(url, stream=True, timeout=5)
+    chunks = response.iter_content(1024)
+    next(chunks)
+    finish_for_cache(response, chunks)
+    response.close()
+    assert session.get(url, timeout=5).from_cache
+    assert hits(origin, '/profile') == 1
+
+
+def test_streamed_page_closed_early_not_stored(origin, session):
+    url = origin.add('/head-only', Cache_Control='max-age=60')
+    response = session.get(url, stream=True, timeout=5)
+    next(response.iter_content(1024))
+    response.close()
+    assert session.cache.stats['stores'] == 0
+    session.get(url, timeout=5)
+    assert hits(origin, '/head-only') == 2
+
+
+def test_streamed_image_not_stored(origin, session):
+    url = origin.add('/photo.jpg', b'\xff\xd8' + b'\0' * 4096, 'image/jpeg', Cache_Control='max-age=60')
+    response = session.get(url, stream=True, timeout=5)
+    b''.join(response.iter_content(1024))
+    response.close()
+    assert session.cache.stats['stores'] == 0
+
+
+def test_lru_evicts_least_recently_used(tmp_path):
+    cache = HTTPCache(str(tmp_path), max_bytes=3000)
+    for name in ('a', 'b'):
+        cache.put(f"http://example.com/{name}", 200, {}, b'x' * 1000)
+    assert cache.get('http://example.com/a')  # a is now more recent than b
+    cache.put('http://example.com/c', 200, {}, b'x' * 1000)
+    assert cache.get('http://example.com/b') is None
+    assert cache.get('http://example.com/a') and cache.get('http://example.com/c')
+    assert cache.stats['evictions'] == 1
+
+
+def test_lru_order_survives_reopen(tmp_path):
+    cache = HTTPCache(str(tmp_path), max_bytes=3000)
+    for name in ('a', 'b'):
+        cache.put(f"http://example.com/{name}", 200, {}, b'x' * 1000)
+        time.sleep(0.01)
+    cache.get('http://example.com/a')
+    reopened = HTTPCache(str(tmp_path), max_bytes=3000)
+    reopened.put('http://example.com/c', 200, {}, b'x' * 1000)
+    assert reopened.get('http://example.com/b') is None
+    assert reopened.get('http://example.com/a')
+
+
+def test_oversized_body_not_stored(tmp_path):
+    cache = HTTPCache(str(tmp_path), max_bytes=1000)
+    cache.put('http://example.com/big', 200, {}, b'x' * 2000)
+    assert cache.get('http://example.com/big') is None
+    assert cache.stats['stores'] == 0
@@ -0,0 +1,111 @@
+import io
+import os
+
+import pytest
+import requests
+from PIL import Image, features
+from requests.structures import CaseInsensitiveDict
+
+from scraper_engine import PROBE_BYTES, ImageRejected, read_checked_head
+
+
+def encode(size, fmt, **options):
+    # Noise keeps the files large, so the probe has to stop early to pass
+    image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    out = io.BytesIO()
+    image.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def response_for(body, content_length=True):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({'Content-Length': str(len(body))} if content_length else {})
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def check(body, content_length=True, **limits):
+    response = response_for(body, content_length)
+    ext, head, chunks, size = read_checked_head(response, **limits)
+    return ext, size, response.raw.tell()
+
+
+FORMATS = [('JPEG', {}, '.jpg'), ('PNG', {}, '.png'), ('WEBP', {}, '.webp'),
+           ('WEBP', {'lossless': True}, '.webp')]
+if features.check('avif'):
+    FORMATS.append(('AVIF', {}, '.avif'))
+
+
+@pytest.mark.parametrize('fmt, options, ext', FORMATS)
+def test_headshots_pass_with_their_size(fmt, options, ext):
+    found_ext, size, read = check(encode((300, 400), fmt, **options))
+    assert (found_ext, size) == (ext, (300, 400))
+    assert read <= PROBE_BYTES
+
+
+@pytest.mark.parametrize('fmt, options, ext', FORMATS)
+def test_banners_are_rejected_from_the_first_bytes(fmt, options, ext):
+    body = encode((900, 300), fmt, **options)
+    assert len(body) > PROBE_BYTES
+    response = response_for(body)
+    with pytest.raises(ImageRejected) as rejected:
+        read_checked_head(response)
+    assert rejected.value.reason == 'aspect'
+    assert response.raw.closed
+
+
+@pytest.mark.parametrize('fmt, options, ext', FORMATS)
+def test_icons_are_rejected_as_small(fmt, options, ext):
+    with pytest.raises(ImageRejected) as rejected:
+        check(encode((96, 96), fmt, **options), min_bytes=0)
+    assert rejected.value.reason == 'small'
+
+
+def test_limits_can_be_relaxed():
+    body = encode((900, 300), 'WEBP')
+    assert check(body, aspect_range=None)[1] == (900, 300)
+    assert check(encode((96, 96), 'PNG'), min_bytes=0, min_side=64)[1] == (96, 96)
+
+
+def test_unknown_sizes_pass():
+    # A valid signature followed by a header Pillow cannot parse
+    body = b'\x89PNG\r\n\x1a\n' + b'\x00' * 4096
+    assert check(body)[:2] == ('.png', None)
+
+
+def test_non_images_are_returned_without_a_size():
+    assert check(b'<html>' + b' ' * 4096)[:2] == (None, None)
+
+
+@pytest.mark.parametrize('content_length', [True, False])
+def test_tiny_bodies_are_rejected(content_length):
+    with pytest.raises(ImageRejected) as rejected:
+        check(encode((16, 16), 'PNG'), content_length)
+    assert rejected.value.reason == 'tiny'
+
+
+def test_oversized_bodies_are_rejected_from_content_length_before_reading():
+    response = response_for(encode((300, 400), 'JPEG'))
+    with pytest.raises(ImageRejected) as rejected:
+        read_checked_head(response, max_bytes=10_000)
+    assert rejected.value.reason == 'oversized'
+    assert response.raw.closed
+
+
+def test_oversized_bodies_without_content_length_are_cut_off_mid_stream():
+    body = encode((300, 400), 'JPEG')
+    ext, head, chunks, size = read_checked_head(response_for(body, content_length=False),
+                                                max_bytes=len(body) - 1)
+    assert (ext, size) == ('.jpg', (300, 400))
+    with pytest.raises(ImageRejected) as rejected:
+        for _ in chunks:
+            pass
+    assert rejected.value.reason == 'oversized'
+
+
+def test_bodies_within_the_limits_stream_through_unchanged():
+    body = encode((300, 400), 'JPEG')
+    ext, head, chunks, size = read_checked_head(response_for(body, content_length=False),
+                                                max_bytes=len(body))
+    assert head + b''.join(chunks) == body
@@ -0,0 +1,48 @@
+import random
+
+from PIL import Image
+
+from image_hash import BKTree, NearDuplicateIndex, dhash, hamming
+
+
+def brute_force(items, item, radius):
+    return sorted((hamming(item, value), value) for value in items if hamming(item, value) <= radius)
+
+
+def test_empty_tree_finds_nothing():
+    assert BKTree().search(0, 64) == []
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(7)
+    base = [rng.getrandbits(64) for _ in range(20)]
+    # Clusters of near copies, so small radii have something to find
+    items = base + [value ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for value in base * 10]
+    tree = BKTree(items)
+    assert len(tree) == len(items)
+    for query in base[:5] + [rng.getrandbits(64) for _ in range(5)]:
+        for radius in (0, 2, 6, 20, 64):
+            assert tree.search(query, radius) == brute_force(items, query, radius)
+
+
+def test_duplicates_are_kept():
+    tree = BKTree([5, 5, 4])
+    assert tree.search(5, 0) == [(0, 5), (0, 5)]
+    assert len(tree) == 3
+
+
+def test_near_duplicate_index_returns_closest_match():
+    index = NearDuplicateIndex(max_distance=4)
+    assert index.check_and_add(0b1111) is None
+    assert index.check_and_add(0b0111) == 0b1111
+    assert index.check_and_add(0xFFFF0000) is None
+
+
+def test_dhash_ignores_rescaling(tmp_path):
+    img = Image.linear_gradient('L').rotate(90).resize((128, 96))
+    img.save(tmp_path / 'big.png')
+    img.resize((64, 48)).save(tmp_path / 'small.png')
+    img.transpose(Image.FLIP_LEFT_RIGHT).save(tmp_path / 'flipped.png')
+    big = dhash(str(tmp_path / 'big.png'))
+    assert hamming(big, dhash(str(tmp_path / 'small.png'))) <= 6
+    assert hamming(big, dhash(str(tmp_path / 'flipped.png'))) > 6
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from job_journal import JobJournal
+from scraper_engine import PERSON_FIELDS, ScraperEngine, SourceUnavailable
+
+CANDIDATES = [{'url': 'https://example.com/a.jpg', 'source': 'GitHub', 'alt': ''}]
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'progress' / 'journal.db')
+
+
+@pytest.fixture
+def journal(journal_path):
+    journal = JobJournal(journal_path)
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def engine(tmp_path, journal):
+    engine = ScraperEngine(download_folder=str(tmp_path / 'images'), log=lambda message, level: None,
+                           journal=journal)
+    yield engine
+    engine.close()
+
+
+def test_person_key_uses_every_identifier():
+    person = {'name': ' Ada Lovelace ', 'github': 'ada'}
+    assert JobJournal.person_key(person, PERSON_FIELDS) == 'Ada Lovelace||ada||||'
+    assert JobJournal.person_key(person, PERSON_FIELDS) != JobJournal.person_key({'name': 'Ada Lovelace'},
+                                                                                 PERSON_FIELDS)
+
+
+def test_started_person_is_not_finished(journal):
+    journal.start('ada')
+    assert journal.finished('ada') is None
+
+
+def test_progress_survives_reopen(journal_path):
+    journal = JobJournal(journal_path)
+    journal.start('ada')
+    journal.record_source('ada', 'GitHub', CANDIDATES)
+    journal.record_download('ada', 'https://example.com/a.jpg', 'images/a.jpg')
+    journal.record_download('ada', 'https://example.com/b.jpg', 'images/b.jpg')
+    journal.close()
+
+    reopened = JobJournal(journal_path)
+    try:
+        assert reopened.finished('ada') is None
+        assert reopened.source_candidates('ada') == {'GitHub': CANDIDATES}
+        assert list(reopened.downloads('ada').items()) == [
+            ('https://example.com/a.jpg', 'images/a.jpg'), ('https://example.com/b.jpg', 'images/b.jpg')]
+        assert reopened.source_candidates('grace') == {} and reopened.downloads('grace') == {}
+    finally:
+        reopened.close()
+
+
+def test_finished_result_survives_reopen(journal_path):
+    journal = JobJournal(journal_path)
+    journal.start('ada')
+    journal.finish('ada', {'name': 'Ada', 'downloaded': 2})
+    journal.start('grace')
+    journal.close()
+
+    reopened = JobJournal(journal_path)
+    try:
+        assert reopened.finished('ada') == {'name': 'Ada', 'downloaded': 2}
+        assert reopened.finished('grace') is None
+    finally:
+        reopened.close()
+
+
+def test_finished_person_is_not_scraped_again(engine, journal):
+    person = {'name': 'Ada', 'github': 'ada'}
+    key = JobJournal.person_key(person, PERSON_FIELDS)
+    journal.start(key)
+    journal.finish(key, {'name': 'Ada', 'found': 3, 'downloaded': 2, 'files': [], 'errors': 0})
+    assert engine.scrape_person(person)['downloaded'] == 2
+
+
+def test_answered_source_is_journaled(engine, journal):
+    async def answer():
+        return CANDIDATES
+
+    assert asyncio.run(engine.journaled_source('ada', 'GitHub', answer())) == CANDIDATES
+    assert journal.source_candidates('ada') == {'GitHub': CANDIDATES}
+
+
+def test_failed_source_is_not_journaled(engine, journal):
+    async def fail():
+        raise SourceUnavailable('GitHub answered 503')
+
+    with pytest.raises(SourceUnavailable):
+        asyncio.run(engine.journaled_source('ada', 'GitHub', fail()))
+    assert journal.source_candidates('ada') == {}
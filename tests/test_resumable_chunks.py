@@ -0,0 +1,154 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from scraper_engine import DownloadCancelled, IncompleteDownload, resumable_chunks, save_atomic
+
+BODY = bytes(range(256)) * 64  # 16 KB
+
+# Drops fall on read-size boundaries: bytes urllib3 had buffered for an
+# unfinished read are lost with the connection, so resumption starts at the
+# last chunk actually yielded
+
+
+class Origin:
+    """What the test server sends: body, ETag, and how many bytes to send before hanging up"""
+
+    def __init__(self):
+        self.body = BODY
+        self.etag = '"v1"'
+        self.drops = []          # bytes to send before dropping, one entry per request
+        self.honour_range = True
+        self.range_offset = 0    # added to the start the server claims in Content-Range
+        self.requests = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        origin = self.server.origin
+        origin.requests.append({'range': self.headers.get('Range'), 'if_range': self.headers.get('If-Range')})
+        body, status, start = origin.body, 200, 0
+        wanted = self.headers.get('Range')
+        if wanted and origin.honour_range and self.headers.get('If-Range') in (None, origin.etag):
+            start = int(wanted[len('bytes='):].rstrip('-'))
+            status = 206
+        self.send_response(status)
+        self.send_header('ETag', origin.etag)
+        self.send_header('Content-Length', str(len(body) - start))
+        if status == 206:
+            self.send_header('Content-Range',
+                             f"bytes {start + origin.range_offset}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        drop = origin.drops.pop(0) if origin.drops else None
+        self.wfile.write(body[start:] if drop is None else body[start:start + drop])
+        if drop is not None:
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+@pytest.fixture
+def origin():
+    server = QuietServer(('127.0.0.1', 0), Handler)
+    server.origin = Origin()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    server.origin.url = f"http://127.0.0.1:{server.server_port}/photo.jpg"
+    yield server.origin
+    server.shutdown()
+    server.server_close()
+
+
+def download(origin, **kwargs):
+    session = requests.Session()
+    response = session.get(origin.url, stream=True, timeout=5)
+    return b''.join(resumable_chunks(session, response, timeout=5, chunk_size=1024, **kwargs))
+
+
+def test_uninterrupted_body_is_passed_through(origin):
+    assert download(origin) == BODY
+    assert len(origin.requests) == 1
+
+
+def test_dropped_body_resumes_with_range_and_if_range(origin):
+    origin.drops = [5120, 3072]
+    assert download(origin) == BODY
+    assert origin.requests[0] == {'range': None, 'if_range': None}
+    resumed = origin.requests[1:]
+    assert [r['range'] for r in resumed] == ['bytes=5120-', 'bytes=8192-']
+    assert all(r['if_range'] == '"v1"' for r in resumed)
+
+
+def test_changed_image_is_not_spliced(origin):
+    origin.drops = [5120]
+    session = requests.Session()
+    response = session.get(origin.url, stream=True, timeout=5)
+    chunks = resumable_chunks(session, response, timeout=5, chunk_size=1024)
+    next(chunks)
+    origin.etag = '"v2"'
+    origin.body = BODY[::-1]
+    with pytest.raises(IncompleteDownload, match='cannot resume at byte 5120'):
+        b''.join(chunks)
+    # If-Range with the old ETag made the server answer 200 with the new body
+    assert origin.requests[1]['if_range'] == '"v1"'
+
+
+def test_server_without_range_support_fails_cleanly(origin):
+    origin.drops = [5120]
+    origin.honour_range = False
+    with pytest.raises(IncompleteDownload, match='status 200'):
+        download(origin)
+
+
+def test_range_at_the_wrong_offset_is_refused(origin):
+    origin.drops = [5120]
+    origin.range_offset = 100
+    with pytest.raises(IncompleteDownload, match='status 206'):
+        download(origin)
+
+
+def test_gives_up_after_retries(origin):
+    origin.drops = [1024, 1024, 1024]
+    with pytest.raises(IncompleteDownload, match='gave up after 3072 bytes'):
+        download(origin, retries=2)
+    assert len(origin.requests) == 3
+
+
+def test_cancel_stops_the_download(origin):
+    with pytest.raises(DownloadCancelled):
+        download(origin, should_continue=lambda: False)
+
+
+def test_save_atomic_leaves_nothing_behind_on_failure(origin, tmp_path):
+    origin.drops = [8192]
+    origin.honour_range = False
+    session = requests.Session()
+    response = session.get(origin.url, stream=True, timeout=5)
+    path = tmp_path / 'photo.jpg'
+    with pytest.raises(IncompleteDownload):
+        save_atomic(resumable_chunks(session, response, timeout=5), str(path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_atomic_renames_a_complete_resumed_body(origin, tmp_path):
+    origin.drops = [8192]
+    session = requests.Session()
+    response = session.get(origin.url, stream=True, timeout=5)
+    path = tmp_path / 'photo.jpg'
+    assert save_atomic(resumable_chunks(session, response, timeout=5), str(path)) == len(BODY)
+    assert path.read_bytes() == BODY
+    assert [p.name for p in tmp_path.iterdir()] == ['photo.jpg']
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from url_index import HEADER, BloomFilter, SeenUrlIndex, UnseenSet
+
+
+def urls(prefix, count):
+    return [f"https://img.example.com/{prefix}/{i}.jpg" for i in range(count)]
+
+
+def test_added_keys_are_always_members(tmp_path):
+    bloom = BloomFilter(str(tmp_path / 'seen'), capacity=5000)
+    added = urls('a', 5000)
+    assert all(bloom.add(url) for url in added[:10])
+    for url in added[10:]:
+        bloom.add(url)
+    assert all(url in bloom for url in added)
+    bloom.close()
+
+
+def test_false_positive_rate_stays_near_the_target(tmp_path):
+    bloom = BloomFilter(str(tmp_path / 'seen'), capacity=5000, error_rate=0.01)
+    for url in urls('a', 5000):
+        bloom.add(url)
+    false_positives = sum(url in bloom for url in urls('b', 20000))
+    assert false_positives / 20000 < 0.02
+    bloom.close()
+
+
+def test_adding_twice_is_not_counted_twice(tmp_path):
+    bloom = BloomFilter(str(tmp_path / 'seen'), capacity=100)
+    assert bloom.add('x')
+    assert not bloom.add('x')
+    assert len(bloom) == 1
+    bloom.close()
+
+
+def test_contents_survive_reopening(tmp_path):
+    path = str(tmp_path / 'seen')
+    bloom = BloomFilter(path, capacity=1000)
+    for url in urls('a', 300):
+        bloom.add(url)
+    bloom.close()
+
+    # An existing file keeps its size whatever capacity is asked for later
+    reopened = BloomFilter(path, capacity=10 ** 6)
+    assert len(reopened) == 300
+    assert all(url in reopened for url in urls('a', 300))
+    assert os.path.getsize(path) == HEADER.size + (reopened.num_bits + 7) // 8
+    reopened.close()
+
+
+def test_file_is_sized_from_capacity_and_error_rate(tmp_path):
+    bloom = BloomFilter(str(tmp_path / 'seen'), capacity=1_000_000, error_rate=0.01)
+    assert 1.1e6 < os.path.getsize(bloom.path) < 1.3e6
+    assert bloom.num_hashes == 7
+    bloom.close()
+
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / 'seen'
+    path.write_bytes(b'not a bloom filter at all, just some bytes')
+    with pytest.raises(ValueError):
+        BloomFilter(str(path))
+
+
+def test_seen_urls_are_per_person_unless_junk(tmp_path):
+    index = SeenUrlIndex(str(tmp_path / 'seen'), capacity=1000)
+    index.record('Ann_Lee', 'https://a.example.com/ann.jpg')
+    index.record('Ann_Lee', 'https://a.example.com/page.html', junk=True)
+    assert index.seen('Ann_Lee', 'https://a.example.com/ann.jpg')
+    assert not index.seen('Bob', 'https://a.example.com/ann.jpg')
+    assert index.seen('Bob', 'https://a.example.com/page.html')
+    index.close()
+
+
+def test_unseen_set_hides_indexed_urls_and_collects_them(tmp_path):
+    index = SeenUrlIndex(str(tmp_path / 'seen'), capacity=1000)
+    index.record('Ann_Lee', 'https://a.example.com/old.jpg')
+    seen = UnseenSet(index, 'Ann_Lee')
+    seen.add('https://a.example.com/this-run.jpg')
+    assert 'https://a.example.com/this-run.jpg' in seen
+    assert 'https://a.example.com/old.jpg' in seen
+    assert 'https://a.example.com/new.jpg' not in seen
+    assert seen.skipped == {'https://a.example.com/old.jpg'}
+    assert set(seen) == {'https://a.example.com/this-run.jpg'}
+    index.close()
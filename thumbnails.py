@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from process_pool import ProcessStage
+
+DEFAULT_THUMB_SIZE = 256
+THUMB_DIR = ".thumbs"
+
+
+def make_thumbnail(source: str, dest: str, size: int = DEFAULT_THUMB_SIZE,
+                   quality: int = 85) -> Tuple[int, int]:
+    """Write a JPEG thumbnail fitting in size x size; returns its (width, height)"""
+    with Image.open(source) as img:
+        # JPEG draft mode decodes straight to the nearest 1/2, 1/4 or 1/8 scale
+        img.draft('RGB', (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size), Image.LANCZOS)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        temp_path = dest + '.part'
+        img.save(temp_path, 'JPEG', quality=quality, optimize=True)
+        os.replace(temp_path, dest)
+        return img.size
+
+
+def _thumbnail_job(job: Tuple[str, str, int]) -> Tuple[Optional[Tuple[int, int]], Optional[str]]:
+    """Process pool entry point: ((width, height), None) or (None, error)"""
+    source, dest, size = job
+    try:
+        return make_thumbnail(source, dest, size), None
+    except Exception as e:
+        return None, str(e)
+
+
+class ThumbnailStage(ProcessStage):
+    """Post-download previews, made once per image across all cores
+
+    Thumbnails live in <root>/.thumbs/, named after the stored object so
+    several links to the same bytes share one preview, and each file's
+    preview is listed in <root>/.thumbs/manifest.jsonl.
+    """
+
+    def __init__(self, root: str, size: int = DEFAULT_THUMB_SIZE, workers: Optional[int] = None):
+        super().__init__(workers)
+        self.root = root
+        self.size = size
+        self.thumb_root = os.path.join(root, THUMB_DIR)
+        self.manifest_path = os.path.join(self.thumb_root, "manifest.jsonl")
+        self._entries = {}
+        os.makedirs(self.thumb_root, exist_ok=True)
+        self.load_manifest()
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+                self._entries[entry['file']] = entry
+
+    def thumb_path(self, path: str) -> str:
+        """Preview location for an image, keyed by the object it links to"""
+        stem = os.path.splitext(os.path.basename(os.path.realpath(path)))[0]
+        return os.path.join(self.thumb_root, f"{stem}_{self.size}.jpg")
+
+    def run(self, paths: Iterable[str]) -> List[Optional[str]]:
+        """Thumbnail paths for paths (None where the image cannot be decoded)"""
+        paths = list(paths)
+        thumbs = [self.thumb_path(path) for path in paths]
+        jobs = {}
+        for path, thumb in zip(paths, thumbs):
+            if not os.path.exists(thumb) and thumb not in jobs:
+                jobs[thumb] = (path, thumb, self.size)
+
+        done = dict(zip(jobs, self.map_jobs(_thumbnail_job, list(jobs.values()))))
+
+        results = []
+        for path, thumb in zip(paths, thumbs):
+            dimensions, error = done.get(thumb, (None, None))
+            if error or not os.path.exists(thumb):
+                results.append(None)
+                continue
+            self.record(path, thumb, dimensions)
+            results.append(thumb)
+        return results
+
+    def record(self, path: str, thumb: str, dimensions: Optional[Tuple[int, int]]):
+        name = os.path.relpath(path, self.root)
+        with self._lock:
+            if name in self._entries:
+                return
+            entry = {'file': name, 'thumb': os.path.relpath(thumb, self.root), 'size': self.size,
+                     'created_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+            if dimensions:
+                entry['width'], entry['height'] = dimensions
+            self._entries[name] = entry
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
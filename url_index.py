@@ -0,0 +1,132 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+# magic, bit count, hash count, reserved, items added
+HEADER = struct.Struct('<8sQIIQ')
+MAGIC = b'SEENBLM1'
+
+DEFAULT_CAPACITY = 10_000_000
+DEFAULT_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """File-backed Bloom filter, memory-mapped so only touched pages are read
+
+    Sized once from capacity and error_rate (about 1.2 MB per million
+    items at 1%); an existing file keeps the size it was created with.
+    Membership can report false positives at roughly error_rate once
+    capacity items are in, never false negatives.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.path = path
+        self._lock = threading.Lock()
+        if not os.path.exists(path):
+            self.create(path, capacity, error_rate)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.num_bits, self.num_hashes, _, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a seen-URL index")
+
+    @staticmethod
+    def create(path: str, capacity: int, error_rate: float):
+        num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, num_bits, num_hashes, 0, 0))
+            f.truncate(HEADER.size + (num_bits + 7) // 8)
+        os.replace(temp_path, path)
+
+    def positions(self, key: str):
+        # Double hashing over one 128-bit digest (Kirsch & Mitzenmacher)
+        h1, h2 = struct.unpack('<QQ', hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest())
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        mapped = self._map
+        return all(mapped[HEADER.size + bit // 8] & (1 << bit % 8) for bit in self.positions(key))
+
+    def add(self, key: str) -> bool:
+        """Set key's bits; True if it was not (apparently) present before"""
+        added = False
+        with self._lock:
+            mapped = self._map
+            for bit in self.positions(key):
+                index = HEADER.size + bit // 8
+                mask = 1 << bit % 8
+                if not mapped[index] & mask:
+                    mapped[index] |= mask
+                    added = True
+            if added:
+                count = HEADER.unpack_from(mapped, 0)[4]
+                struct.pack_into('<Q', mapped, HEADER.size - 8, count + 1)
+        return added
+
+    def __len__(self) -> int:
+        """Distinct items added (approximate: false positives are not counted)"""
+        return HEADER.unpack_from(self._map, 0)[4]
+
+    def close(self):
+        with self._lock:
+            if not self._map.closed:
+                self._map.flush()
+                self._map.close()
+            self._file.close()
+
+
+class SeenUrlIndex:
+    """Persistent record of image URLs already handled, per person and globally
+
+    A URL saved (or linked, or dropped as a near-duplicate) for a person is
+    skipped for that person on later runs; a URL that is not an image at
+    all is skipped for everyone. Rejects that depend on settings (size and
+    shape limits) and transient failures are not recorded, since entries
+    can never be removed. One process should own the file at a time.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.bloom = BloomFilter(path, capacity, error_rate)
+
+    def seen(self, person: str, url: str) -> bool:
+        return f"*\0{url}" in self.bloom or f"{person}\0{url}" in self.bloom
+
+    def record(self, person: str, url: str, junk: bool = False):
+        self.bloom.add(f"{person}\0{url}")
+        if junk:
+            self.bloom.add(f"*\0{url}")
+
+    def close(self):
+        self.bloom.close()
+
+
+class UnseenSet(set):
+    """A scraper's per-person seen set that also counts URLs in a SeenUrlIndex as seen
+
+    Sources check `url in seen` before applying their result limits, so
+    URLs handled in earlier runs never take a candidate slot. The ones
+    turned away are collected in skipped.
+    """
+
+    def __init__(self, index: SeenUrlIndex, person: str):
+        super().__init__()
+        self.index = index
+        self.person = person
+        self.skipped = set()
+
+    def __contains__(self, url) -> bool:
+        if super().__contains__(url) or url in self.skipped:
+            return True
+        if self.index.seen(self.person, url):
+            self.skipped.add(url)
+            return True
+        return False